@@ -0,0 +1,203 @@
+"""
+Vectorised battle engine for running many independent BACK mode battles at once.
+
+Every battle uses simple mode stats and the default MonsterTeam.choose_action, which is what
+win-rate studies run. K battles are held as (K, TEAM_LIMIT) arrays per side and every unfinished
+battle advances by one turn per step using masked NumPy operations.
+
+Usage:
+```
+engine = BatchBattle()
+results = engine.battle_teams(teams1, teams2)   # array of Battle.Result values
+```
+"""
+from __future__ import annotations
+
+from battle import Battle
+from battle_state import team_members
+from team import MonsterTeam
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+class BatchBattle:
+    """
+    Each side of the batch is stored as four (K, TEAM_LIMIT) integer arrays: class number, hp,
+    level and original level, with the monsters in queue order. A BACK team never reorders its
+    monsters, swapping just moves on to the next one and fainted monsters drop out, so the side
+    is a ring where the out monster sits at `head` and the team is every alive slot after it.
+    Empty slots have class -1 and 0 hp, so they are skipped like fainted monsters.
+    """
+
+    TEAM_LIMIT = MonsterTeam.TEAM_LIMIT
+
+    CLASS = 0
+    HP = 1
+    LEVEL = 2
+    ORIGINAL_LEVEL = 3
+
+    def __init__(self) -> None:
+        if np is None:
+            raise ImportError("BatchBattle requires numpy.")
+        self._table_size = -1
+        # Offsets from the head to every other slot of the ring, in serving order.
+        self._offsets = np.arange(1, self.TEAM_LIMIT)
+
+    def _tables(self) -> None:
+        """Copies the Battle.simulate_fast class tables into arrays, when new classes were registered."""
+        if self._table_size == len(Battle._fast_classes):
+            return
+        self._table_size = len(Battle._fast_classes)
+        self.speed = np.array(Battle._fast_speed, dtype=np.int64)
+        self.max_hp = np.array(Battle._fast_max_hp, dtype=np.int64)
+        self.evolution = np.array(Battle._fast_evolution, dtype=np.int64)
+        self.damage = np.array(Battle._fast_damage, dtype=np.int64)
+
+    def pack(self, teams: list[MonsterTeam]) -> np.ndarray:
+        """
+        Packs BACK mode teams into a (4, K, TEAM_LIMIT) array of class number, hp, level and original level.
+        :raises ValueError: if a team is not in BACK mode, or is one simulate_fast cannot inline
+            (see Battle._fast_supported): a MonsterTeam subclass, a team with its own choose_action
+            or a policy, or one holding a custom or complex mode monster.
+        """
+        state = np.zeros((4, len(teams), self.TEAM_LIMIT), dtype=np.int64)
+        state[self.CLASS] = -1
+        for k, team in enumerate(teams):
+            if team.team_mode != MonsterTeam.TeamMode.BACK:
+                raise ValueError("BatchBattle only supports BACK mode teams.")
+            if not Battle._fast_supported(team):
+                raise ValueError("BatchBattle only supports stock teams of stock simple mode monsters with the default choose_action.")
+            for slot, monster in enumerate(team_members(team)):
+                state[self.CLASS, k, slot] = Battle._fast_class(type(monster))
+                state[self.HP, k, slot] = monster.get_hp()
+                state[self.LEVEL, k, slot] = monster.get_level()
+                state[self.ORIGINAL_LEVEL, k, slot] = monster.original_level
+        return state
+
+    def battle_teams(self, teams1: list[MonsterTeam], teams2: list[MonsterTeam]) -> np.ndarray:
+        """Battles teams1[k] against teams2[k] for every k. The teams themselves are left untouched."""
+        if len(teams1) != len(teams2):
+            raise ValueError("Both sides need the same number of teams.")
+        return self.run(self.pack(teams1), self.pack(teams2))
+
+    def _next_alive(self, hp: np.ndarray, rows: np.ndarray, head: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        For each row, the first alive slot after head in serving order, and whether there is one.
+        Rows with nobody left keep their head, the same as serving a queue the monster was just appended to.
+        """
+        ring = (head[:, None] + self._offsets) % self.TEAM_LIMIT
+        alive = hp[rows[:, None], ring] > 0
+        found = alive.any(axis=1)
+        following = ring[np.arange(len(rows)), alive.argmax(axis=1)]
+        return np.where(found, following, head), found
+
+    def _level_up(self, state: np.ndarray, rows: np.ndarray, head: np.ndarray) -> None:
+        """Levels up the out monsters of the given rows and evolves the ones that are ready."""
+        if len(rows) == 0:
+            return
+        state[self.LEVEL, rows, head] += 1
+        current = state[self.CLASS, rows, head]
+        evolution = self.evolution[current]
+        ready = (evolution != -1) & (state[self.LEVEL, rows, head] > state[self.ORIGINAL_LEVEL, rows, head])
+        rows = rows[ready]
+        head = head[ready]
+        current = current[ready]
+        evolved = evolution[ready]
+        # Evolving keeps the damage received, as in MonsterBase.evolve.
+        state[self.HP, rows, head] = self.max_hp[evolved] - (self.max_hp[current] - state[self.HP, rows, head])
+        state[self.CLASS, rows, head] = evolved
+        state[self.ORIGINAL_LEVEL, rows, head] = state[self.LEVEL, rows, head]
+
+    def run(self, state1: np.ndarray, state2: np.ndarray) -> np.ndarray:
+        """
+        Runs every battle in the batch to completion. The packed states are updated in place.
+
+        Returns an int8 array of Battle.Result values, one per battle.
+
+        Complexity: O(T x K) array work, where T is the number of turns of the longest battle.
+        """
+        self._tables()
+        n_battles = state1.shape[1]
+        results = np.zeros(n_battles, dtype=np.int8)
+        team1_wins = Battle.Result.TEAM1.value
+        team2_wins = Battle.Result.TEAM2.value
+        draw = Battle.Result.DRAW.value
+        cls1, hp1, _, _ = state1
+        cls2, hp2, _, _ = state2
+        # Both teams retrieve their first monster, which is at slot 0.
+        head1 = np.zeros(n_battles, dtype=np.int64)
+        head2 = np.zeros(n_battles, dtype=np.int64)
+
+        rows = np.arange(n_battles)
+        while len(rows):
+            h1 = head1[rows]
+            h2 = head2[rows]
+
+            # Default choose_action for both teams, decided before either swaps.
+            speed1 = self.speed[cls1[rows, h1]]
+            speed2 = self.speed[cls2[rows, h2]]
+            out_hp1 = hp1[rows, h1]
+            out_hp2 = hp2[rows, h2]
+            attack1 = (speed1 >= speed2) | (out_hp1 >= out_hp2)
+            attack2 = (speed2 >= speed1) | (out_hp2 >= out_hp1)
+            swap = ~attack1
+            if swap.any():
+                h1[swap] = self._next_alive(hp1, rows[swap], h1[swap])[0]
+            swap = ~attack2
+            if swap.any():
+                h2[swap] = self._next_alive(hp2, rows[swap], h2[swap])[0]
+
+            c1 = cls1[rows, h1]
+            c2 = cls2[rows, h2]
+            speed1 = self.speed[c1]
+            speed2 = self.speed[c2]
+            damage12 = self.damage[c1, c2]
+            damage21 = self.damage[c2, c1]
+            first1 = speed1 > speed2
+            first2 = speed2 > speed1
+            tie = speed1 == speed2
+            out_hp1 = hp1[rows, h1] - np.where(first2 | tie, damage21, 0)
+            out_hp2 = hp2[rows, h2] - np.where(first1 | tie, damage12, 0)
+            # The slower monster retaliates if it survived and chose to attack.
+            out_hp1 -= np.where(first1 & (out_hp2 > 0) & attack2, damage21, 0)
+            out_hp2 -= np.where(first2 & (out_hp1 > 0) & attack1, damage12, 0)
+            both_alive = (out_hp1 > 0) & (out_hp2 > 0)
+            out_hp1 -= both_alive
+            out_hp2 -= both_alive
+            hp1[rows, h1] = out_hp1
+            hp2[rows, h2] = out_hp2
+
+            dead1 = out_hp1 <= 0
+            dead2 = out_hp2 <= 0
+            next1, left1 = self._next_alive(hp1, rows, h1)
+            next2, left2 = self._next_alive(hp2, rows, h2)
+            turn_results = np.zeros(len(rows), dtype=np.int8)
+
+            both_dead = dead1 & dead2
+            turn_results[both_dead & left1 & ~left2] = team1_wins
+            turn_results[both_dead & ~left1 & left2] = team2_wins
+            turn_results[both_dead & ~left1 & ~left2] = draw
+            carry_on = both_dead & left1 & left2
+            h1[carry_on] = next1[carry_on]
+            h2[carry_on] = next2[carry_on]
+
+            only2 = dead2 & ~dead1
+            turn_results[only2 & ~left2] = team1_wins
+            winners = only2 & left2
+            h2[winners] = next2[winners]
+            self._level_up(state1, rows[winners], h1[winners])
+
+            only1 = dead1 & ~dead2
+            turn_results[only1 & ~left1] = team2_wins
+            winners = only1 & left1
+            h1[winners] = next1[winners]
+            self._level_up(state2, rows[winners], h2[winners])
+
+            head1[rows] = h1
+            head2[rows] = h2
+            results[rows] = turn_results
+            rows = rows[turn_results == 0]
+        return results
@@ -1,9 +1,19 @@
 from __future__ import annotations
+import copy
+from collections import deque
 from enum import auto
-from typing import Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+from weakref import WeakKeyDictionary
 
 from base_enum import BaseEnum
+from monster_base import MonsterBase
 from team import MonsterTeam
+from battle_state import BattleState, team_members, fill_team, copy_team, encode_team, decode_team, encode_battle, decode_battle
+from battle_cache import OutcomeCache
+from battle_events import EventRecorder, EventType, monster_id
+
+if TYPE_CHECKING:
+    from battle_replay import BattleRecorder
 
 
 class Battle:
@@ -18,8 +28,60 @@ class Battle:
         TEAM2 = auto()
         DRAW = auto()
 
-    def __init__(self, verbosity=0) -> None:
+    # Monster methods simulate_fast inlines. A class overriding any of them goes through battle() instead.
+    FAST_MONSTER_METHODS = (
+        "get_hp", "set_hp", "get_attack", "get_defense", "get_speed", "get_max_hp",
+        "alive", "dead", "attack", "level_up", "ready_to_evolve", "evolve",
+    )
+
+    # Whether simulate_fast skips runs of identical attack-only turns in one step.
+    FAST_FORWARD = True
+
+    # Per monster class tables shared by every simulate_fast call, indexed by class number.
+    _fast_index: dict = {}
+    _fast_classes: list = []
+    _fast_attack: list = []
+    _fast_defense: list = []
+    _fast_speed: list = []
+    _fast_max_hp: list = []
+    _fast_evolution: list = []
+    _fast_damage: list = []
+
+    # Number of recent state hashes kept for cycle detection.
+    DEFAULT_CYCLE_MEMORY = 1024
+
+    def __init__(
+        self,
+        verbosity=0,
+        cache: Optional[OutcomeCache] = None,
+        max_turns: Optional[int] = None,
+        detect_cycles: bool = False,
+        cycle_memory: int = DEFAULT_CYCLE_MEMORY,
+        events: Optional[EventRecorder] = None,
+        recorder: Optional[BattleRecorder] = None,
+    ) -> None:
+        """
+        :cache: outcome cache consulted by battle(), see battle_cache.
+        :max_turns: turn budget per battle. A battle reaching it stalls.
+        :detect_cycles: hash the battle state every turn and stall when a state repeats
+            within the last cycle_memory turns.
+        :events: recorder that battle() and process_turn emit structured events into, see battle_events.
+        :recorder: BattleRecorder that keeps the actions and checkpoints needed to replay each battle,
+            see battle_replay. Recorded battles bypass the cache.
+
+        A stalled battle ends as a DRAW, sets `stalled` and increments `stall_count`.
+        """
         self.verbosity = verbosity
+        self.cache = cache
+        self.max_turns = max_turns
+        self.detect_cycles = detect_cycles
+        self.cycle_memory = cycle_memory
+        self.stalled = False
+        self.stall_count = 0
+        self.events = events
+        self.recorder = recorder
+        # Set by PhaseProfiler.attach, see battle_profiler.
+        self.profiler = None
 
     def process_turn(self) -> Optional[Battle.Result]:
         """
@@ -29,29 +91,40 @@ class Battle:
         * remove fainted monsters and retrieve new ones.
         * return the battle result if completed.
         """
+        action_team_1, action_team_2 = self.choose_actions()
+        if self.recorder is not None:
+            self.recorder.record_turn(action_team_1, action_team_2)
+        return self.apply_actions(action_team_1, action_team_2)
+
+    def choose_actions(self) -> tuple[Battle.Action, Battle.Action]:
+        """The actions both teams pick for this turn, decided before either is applied."""
         #Gets actions for both teams
-        action_team_1 = self.team1.choose_action(self.out1, self.out2)
-        action_team_2 = self.team2.choose_action(self.out2, self.out1)
-
-        #Completes team 1 action if its not an attack
-        if action_team_1 != Battle.Action.ATTACK:
-            self.team1.add_to_team(self.out1)
-            if action_team_1 == Battle.Action.SPECIAL:
-                self.team1.special()
-            self.out1 = self.team1.retrieve_from_team()
-            team_1_attack = False
-        else:
-            team_1_attack = True
-
-        #Completes team 2 action if its not an attack
-        if action_team_2 != Battle.Action.ATTACK:
-            self.team2.add_to_team(self.out2)
-            if action_team_2 == Battle.Action.SPECIAL:
-                self.team2.special()
-            self.out2 = self.team2.retrieve_from_team()
-            team_2_attack = False
+        return self.choose_action(1), self.choose_action(2)
+
+    def choose_action(self, side: int) -> Battle.Action:
+        """
+        The action team 1 or 2 picks: from its policy (see policies) when it has one,
+        otherwise from its choose_action.
+        """
+        if side == 1:
+            team, currently_out, enemy = self.team1, self.out1, self.out2
         else:
-            team_2_attack = True
+            team, currently_out, enemy = self.team2, self.out2, self.out1
+        if team.policy is not None:
+            return team.policy.choose_action(self, side)
+        return team.choose_action(currently_out, enemy)
+
+    def apply_actions(self, action_team_1: Battle.Action, action_team_2: Battle.Action) -> Optional[Battle.Result]:
+        """
+        Plays out a turn in which team 1 and team 2 take the given actions.
+        The rest of the turn is as described in process_turn.
+        """
+        if self.events is not None:
+            self.events.emit(EventType.ACTION.value, self.turn_number, 1, action_team_1.value, 0)
+            self.events.emit(EventType.ACTION.value, self.turn_number, 2, action_team_2.value, 0)
+
+        team_1_attack = self._swap(1, action_team_1)
+        team_2_attack = self._swap(2, action_team_2)
 
         #Checks if any monsters chose to attack
         if team_1_attack or team_2_attack:
@@ -60,34 +133,61 @@ class Battle:
 
         #checks if monster 1 is faster than monster 2, then monster 1 attacks first. Also monster 2 can retaliate
             if speed_1 > speed_2:
-                self.out1.attack(self.out2)
+                self._attack(1)
                 if self.out2.alive() and team_2_attack:
-                    self.out2.attack(self.out1)
+                    self._attack(2)
 
         #checks if monster 2 is faster than monster 1, then monster 2 attacks first. Also monster 1 can retaliate
             elif speed_2 > speed_1:
-                self.out2.attack(self.out1)
+                self._attack(2)
                 if self.out1.alive() and team_1_attack:
-                    self.out1.attack(self.out2)
+                    self._attack(1)
         #Both monsters attack each other    
             else:
-                self.out1.attack(self.out2)
-                self.out2.attack(self.out1)
+                self._attack(1)
+                self._attack(2)
+        self._tick()
+
+        #checks if both monsters are still alive
+        if self.out1.alive() and self.out2.alive():
+            return None
+        return self._faint()
+
+    def _swap(self, side: int, action: Battle.Action) -> bool:
+        """
+        Completes the action of team 1 or 2 if it is not an attack: the out monster goes back into
+        the team, which uses its special for SPECIAL, and the next one comes out.
+        Returns whether the team attacks this turn.
+        """
+        if action == Battle.Action.ATTACK:
+            return True
+        team = self.team1 if side == 1 else self.team2
+        team.add_to_team(self.out1 if side == 1 else self.out2)
+        if action == Battle.Action.SPECIAL:
+            team.special()
+        self._retrieve(side)
+        return False
+
+    def _tick(self) -> None:
         #If both monsters after using each others actions and survive then reduce 1 from there hp.
         if self.out1.alive() and self.out2.alive():
             self.out1.set_hp(self.out1.get_hp() - 1)
             self.out2.set_hp(self.out2.get_hp() - 1)
 
-        #checks if both monsters are still alive
-        if self.out1.alive() and self.out2.alive():
-            return None
+    def _faint(self) -> Optional[Battle.Result]:
+        """Handles the end of a turn in which a monster fainted. Returns the result if the battle is over."""
+        if self.events is not None:
+            if self.out1.dead():
+                self.events.emit(EventType.FAINT.value, self.turn_number, 1, monster_id(self.out1), 0)
+            if self.out2.dead():
+                self.events.emit(EventType.FAINT.value, self.turn_number, 2, monster_id(self.out2), 0)
 
         #Does a retreiveing and end of game checks     
-        elif self.out1.dead() and self.out2.dead():
+        if self.out1.dead() and self.out2.dead():
             if len(self.team1) > 0:
                 if len(self.team2) > 0:
-                    self.out1 = self.team1.retrieve_from_team()
-                    self.out2 = self.team2.retrieve_from_team()
+                    self._retrieve(1)
+                    self._retrieve(2)
                 else:
                     return self.Result.TEAM1
             else:
@@ -98,26 +198,54 @@ class Battle:
         elif self.out1.alive() and self.out2.dead():
             if len(self.team2) == 0:
                 return self.Result.TEAM1
-            self.out2 = self.team2.retrieve_from_team()
-        
-
-            self.out1.level_up()
-            if self.out1.ready_to_evolve():
-                self.out1 = self.out1.evolve()
+            self._retrieve(2)
+            self._level_up(1)
 
         #Does a retreiveing and end of game checks and evolution check.     
         elif self.out1.dead() and self.out2.alive():
             if len(self.team1) == 0:
                 return self.Result.TEAM2
-            self.out1 = self.team1.retrieve_from_team()
+            self._retrieve(1)
+            self._level_up(2)
+
+    def _retrieve(self, side: int) -> None:
+        """Sends out the next monster of team 1 or 2."""
+        if side == 1:
+            self.out1 = monster = self.team1.retrieve_from_team()
+        else:
+            self.out2 = monster = self.team2.retrieve_from_team()
+        if self.events is not None:
+            self.events.emit(EventType.RETRIEVE.value, self.turn_number, side, monster_id(monster), monster.get_hp())
 
-            self.out2.level_up()
-            if self.out2.ready_to_evolve():
-                self.out2 = self.out2.evolve()
-    
+    def _attack(self, side: int) -> None:
+        """The out monster of team 1 or 2 attacks the other out monster."""
+        attacker, defender = (self.out1, self.out2) if side == 1 else (self.out2, self.out1)
+        if self.events is None:
+            attacker.attack(defender)
+            return
+        hp_before = defender.get_hp()
+        attacker.attack(defender)
+        self.events.emit(EventType.ATTACK.value, self.turn_number, side, hp_before - defender.get_hp(), defender.get_hp())
 
+    def _level_up(self, side: int) -> None:
+        """Levels up the out monster of team 1 or 2 after it made the other faint, evolving it if ready."""
+        monster = self.out1 if side == 1 else self.out2
+        monster.level_up()
+        if self.events is not None:
+            self.events.emit(EventType.LEVEL_UP.value, self.turn_number, side, monster_id(monster), monster.get_level())
+        if monster.ready_to_evolve():
+            self._evolve(side)
 
-        
+    def _evolve(self, side: int) -> None:
+        """Replaces the out monster of team 1 or 2 with its evolution."""
+        monster = self.out1 if side == 1 else self.out2
+        evolved = monster.evolve()
+        if side == 1:
+            self.out1 = evolved
+        else:
+            self.out2 = evolved
+        if self.events is not None:
+            self.events.emit(EventType.EVOLVE.value, self.turn_number, side, monster_id(monster), monster_id(evolved))
 
     def battle(self, team1: MonsterTeam, team2: MonsterTeam) -> Battle.Result:
         if self.verbosity > 0:
@@ -126,12 +254,459 @@ class Battle:
         self.turn_number = 0
         self.team1 = team1
         self.team2 = team2
-        self.out1 = team1.retrieve_from_team()
-        self.out2 = team2.retrieve_from_team()
+        self.stalled = False
+        watch_stalls = self.max_turns is not None or self.detect_cycles
+        if self.detect_cycles:
+            self._seen_states = set()
+            self._seen_order = deque()
+
+        # Outcomes can only be reused when both teams play the deterministic default policy.
+        # A battle answered by the cache would leave no turns to record.
+        cache = self.cache if self.recorder is None else None
+        if cache is not None and not (self._fast_supported(team1) and self._fast_supported(team2)):
+            cache = None
+        if cache is not None:
+            visited = [(encode_team(team1), encode_team(team2))]
+            entry = cache.get(visited[0])
+            if entry is not None:
+                decode_battle(self, entry[1])
+                if self.events is not None:
+                    self.events.emit(EventType.RESULT.value, 0, 0, entry[0].value, 0)
+                return entry[0]
+
+        self._retrieve(1)
+        self._retrieve(2)
+        if self.recorder is not None:
+            self.recorder.start(self)
         result = None
         while result is None:
+            if watch_stalls and self._is_stalled():
+                self.stalled = True
+                self.stall_count += 1
+                result = self.Result.DRAW
+                break
+            if cache is not None and cache.per_turn:
+                state = encode_battle(self)
+                entry = cache.get(state)
+                if entry is not None:
+                    decode_battle(self, entry[1])
+                    result = entry[0]
+                    break
+                visited.append(state)
+            if self.events is not None:
+                self.events.emit(EventType.TURN_START.value, self.turn_number, 0, 0, 0)
+            if self.recorder is not None:
+                self.recorder.checkpoint(self)
             result = self.process_turn()
+            self.turn_number += 1
         # Add any postgame logic here.
+        if self.events is not None:
+            self.events.emit(EventType.RESULT.value, self.turn_number, 0, result.value, self.turn_number)
+        if self.recorder is not None:
+            self.recorder.finish(self, result)
+        if cache is not None and not self.stalled:
+            # Every state on the way leads to the same end, so they all share the final state.
+            final_state = encode_battle(self)
+            for state in visited:
+                cache.put(state, result, final_state)
+        return result
+
+    def is_plain(self) -> bool:
+        """
+        Whether battles on this engine have no side effects beyond their result: no cache, no event
+        or battle recorder and no stall guards. Such battles can run through simulate_fast, anywhere.
+        """
+        return (
+            self.cache is None and self.events is None and self.recorder is None
+            and self.max_turns is None and not self.detect_cycles
+        )
+
+    def battle_many(self, pairs: Iterable[tuple[MonsterTeam, MonsterTeam]]) -> Iterator[Battle.Result]:
+        """
+        Battles every (team1, team2) pair with this engine and yields the results one at a time,
+        so only the current pair is held in memory.
+
+        A team object may appear in any number of pairs: the first time it is seen its state is
+        kept as a prototype (see battle_state.encode_team), and before each later battle it is reset
+        from that prototype, rather than regenerated from its monster classes. Prototypes are held
+        in a WeakKeyDictionary, so teams the iterable lets go of are not kept alive.
+
+        Battles go through simulate_fast unless the engine has a cache, an event or battle recorder,
+        or stall guards, in which case they go through battle().
+
+        Complexity: O(B x battle) for B pairs, plus O(n) per battle to reset each team.
+        """
+        run = self.simulate_fast if self.is_plain() else self.battle
+        prototypes = WeakKeyDictionary()
+        for team1, team2 in pairs:
+            for team in (team1, team2):
+                prototype = prototypes.get(team)
+                if prototype is None:
+                    prototypes[team] = encode_team(team)
+                else:
+                    decode_team(team, prototype)
+            yield run(team1, team2)
+
+    def _is_stalled(self) -> bool:
+        """
+        Whether the battle has used up its turn budget, or (with detect_cycles) is back in a state
+        seen within the last cycle_memory turns. Only hashes are kept, so memory stays bounded.
+        :complexity: O(n) to hash the state of n monsters.
+        """
+        if self.max_turns is not None and self.turn_number >= self.max_turns:
+            return True
+        if self.detect_cycles:
+            state_hash = hash(encode_battle(self))
+            if state_hash in self._seen_states:
+                return True
+            self._seen_states.add(state_hash)
+            self._seen_order.append(state_hash)
+            if len(self._seen_order) > self.cycle_memory:
+                self._seen_states.discard(self._seen_order.popleft())
+        return False
+
+    def snapshot(self) -> tuple[int, BattleState]:
+        """
+        Immutable, hashable record of the battle in progress: the turn number and the battle state
+        (see battle_state). restore brings the battle back to it.
+        :complexity: O(n) for n monsters in both teams.
+        """
+        return (self.turn_number, encode_battle(self))
+
+    def restore(self, snapshot: tuple[int, BattleState]) -> None:
+        """
+        Puts the battle back in the state of a snapshot, with new monster instances in the
+        existing team objects. Continuing with process_turn plays out as it would have from then.
+        :complexity: O(n) for n monsters in the snapshot.
+        """
+        self.turn_number, state = snapshot
+        decode_battle(self, state)
+
+    def fork(self) -> Battle:
+        """
+        An independent copy of the battle in progress, for trying out alternative turns.
+        Teams are copied with battle_state.copy_team and the out monsters shallow copied, so nothing
+        the fork does affects this battle. The fork has no cache, event recorder or battle recorder,
+        and is not profiled: the profiler's wrappers are bound to this battle, so a fork keeping them
+        would play its turns on this battle instead.
+        :complexity: O(n) for n monsters in both teams.
+        """
+        clone = copy.copy(self)
+        if clone.profiler is not None:
+            clone.profiler.detach(clone)
+        clone.cache = None
+        clone.events = None
+        clone.recorder = None
+        clone.team1 = copy_team(self.team1)
+        clone.team2 = copy_team(self.team2)
+        clone.out1 = copy.copy(self.out1)
+        clone.out2 = copy.copy(self.out2)
+        if self.detect_cycles and hasattr(self, "_seen_states"):
+            clone._seen_states = set(self._seen_states)
+            clone._seen_order = deque(self._seen_order)
+        return clone
+
+    @classmethod
+    def _fast_class(cls, monster_class: type[MonsterBase]) -> int:
+        """
+        Returns the table number of a monster class, registering it (and its evolutions) on first use.
+        Returns -1 if the class overrides behaviour that simulate_fast inlines.
+
+        Registering computes the damage against every class already known by running MonsterBase.attack
+        on fresh instances, so the kernel can never drift from the real damage formula.
+        """
+        index = cls._fast_index.get(monster_class)
+        if index is not None:
+            return index
+        for name in cls.FAST_MONSTER_METHODS:
+            if getattr(monster_class, name) is not getattr(MonsterBase, name):
+                cls._fast_index[monster_class] = -1
+                return -1
+
+        evolution_class = monster_class.get_evolution()
+        evolution = -1
+        if evolution_class is not None:
+            evolution = cls._fast_class(evolution_class)
+            if evolution == -1:
+                cls._fast_index[monster_class] = -1
+                return -1
+
+        index = len(cls._fast_classes)
+        sample = monster_class()
+        cls._fast_index[monster_class] = index
+        cls._fast_classes.append(monster_class)
+        cls._fast_attack.append(sample.get_attack())
+        cls._fast_defense.append(sample.get_defense())
+        cls._fast_speed.append(sample.get_speed())
+        cls._fast_max_hp.append(sample.get_max_hp())
+        cls._fast_evolution.append(evolution)
+        cls._fast_damage.append([])
+        for other in range(index + 1):
+            cls._fast_damage[index].append(cls._fast_attack_damage(monster_class, cls._fast_classes[other]))
+            if other != index:
+                cls._fast_damage[other].append(cls._fast_attack_damage(cls._fast_classes[other], monster_class))
+        return index
+
+    @staticmethod
+    def _fast_attack_damage(attacker: type[MonsterBase], defender: type[MonsterBase]) -> int:
+        """Damage one fresh attacker instance deals to one fresh defender instance."""
+        target = defender()
+        hp_before = target.get_hp()
+        attacker().attack(target)
+        return hp_before - target.get_hp()
+
+    @classmethod
+    def _fast_supported(cls, team: MonsterTeam) -> bool:
+        """Whether a team uses only the default policy, stock team modes and stock simple mode monsters."""
+        if type(team) is not MonsterTeam or "choose_action" in vars(team) or team.policy is not None:
+            return False
+        for monster in team_members(team):
+            if not monster.simple_mode or cls._fast_class(type(monster)) == -1:
+                return False
+        return True
+
+    def simulate_fast(self, team1: MonsterTeam, team2: MonsterTeam) -> Battle.Result:
+        """
+        Runs the same battle as battle(), but flattened into one loop over plain integers.
+
+        Both teams are unpacked into per monster lists (class number, hp, level, original level),
+        the turn rules of process_turn and the default MonsterTeam.choose_action are applied inline,
+        and the final state is written back into the teams, out1 and out2 afterwards.
+        Damage between two classes never changes in simple mode, so it is looked up from a table.
+        While both out monsters attack and neither can faint, every turn costs each of them the same hp,
+        so with FAST_FORWARD those turns are applied in one step (counted in fast_forwarded_turns).
+
+        Teams with a custom choose_action or policy, monsters that override battle behaviour, and engines
+        that are not plain (see is_plain) fall back to battle().
+
+        Complexity: O(T + n) where T is the number of turns and n the number of monsters,
+        against O(T x (effectiveness lookup + method calls)) for battle().
+        """
+        if not (self.is_plain() and self._fast_supported(team1) and self._fast_supported(team2)):
+            return self.battle(team1, team2)
+        if self.verbosity > 0:
+            print(f"Team 1: {team1} vs. Team 2: {team2}")
+        self.turn_number = 0
+        self.team1 = team1
+        self.team2 = team2
+        self.stalled = False
+
+        speed = self._fast_speed
+        max_hp = self._fast_max_hp
+        evolution = self._fast_evolution
+        damage = self._fast_damage
+        stat_tables = {
+            MonsterTeam.SortMode.ATTACK.value: self._fast_attack,
+            MonsterTeam.SortMode.DEFENSE.value: self._fast_defense,
+            MonsterTeam.SortMode.SPEED.value: self._fast_speed,
+        }
+
+        # One slot per monster across both teams.
+        monsters = []
+        cls_of = []
+        hp = []
+        level = []
+        original_level = []
+        modes = [0, 0]
+        queues = [None, None]
+        keys = [None, None]
+        key_tables = [None, None]
+        descending = [True, True]
+        for side, team in enumerate((team1, team2)):
+            queue = []
+            for monster in team_members(team):
+                queue.append(len(monsters))
+                monsters.append(monster)
+                cls_of.append(self._fast_index[type(monster)])
+                hp.append(monster.get_hp())
+                level.append(monster.get_level())
+                original_level.append(monster.original_level)
+            queues[side] = queue
+            if team.team_mode == MonsterTeam.TeamMode.FRONT:
+                modes[side] = 0
+            elif team.team_mode == MonsterTeam.TeamMode.BACK:
+                modes[side] = 1
+            else:
+                modes[side] = 2
+                keys[side] = [team.team.array[i].key for i in range(len(team.team))]
+                descending[side] = team.descending_checker
+                # None means the key is read from the slot instead of a class table.
+                key_tables[side] = stat_tables.get(team.sort_key.value)
+
+        def retrieve(side: int) -> int:
+            queue = queues[side]
+            if modes[side] == 0:
+                return queue.pop()
+            if modes[side] == 1:
+                return queue.pop(0)
+            if descending[side]:
+                keys[side].pop()
+                return queue.pop()
+            keys[side].pop(0)
+            return queue.pop(0)
+
+        def add(side: int, slot: int) -> None:
+            if modes[side] != 2:
+                queues[side].append(slot)
+                return
+            team = team1 if side == 0 else team2
+            if key_tables[side] is not None:
+                key = key_tables[side][cls_of[slot]]
+            elif team.sort_key == MonsterTeam.SortMode.HP:
+                key = hp[slot]
+            else:
+                key = level[slot]
+            # Same binary search as ArraySortedList._index_to_add, so ties land in the same place.
+            side_keys = keys[side]
+            low = 0
+            high = len(side_keys) - 1
+            while low <= high:
+                mid = (low + high) // 2
+                if side_keys[mid] < key:
+                    low = mid + 1
+                elif side_keys[mid] > key:
+                    high = mid - 1
+                else:
+                    low = mid
+                    break
+            side_keys.insert(low, key)
+            queues[side].insert(low, slot)
+
+        queue1, queue2 = queues
+        out1 = retrieve(0)
+        out2 = retrieve(1)
+        c1 = cls_of[out1]
+        c2 = cls_of[out2]
+        hp1 = hp[out1]
+        hp2 = hp[out2]
+        fast_forward = self.FAST_FORWARD
+        self.fast_forwarded_turns = 0
+        turn_number = 0
+        while True:
+            turn_number += 1
+            # Default choose_action for both teams, decided before either swaps.
+            attack1 = speed[c1] >= speed[c2] or hp1 >= hp2
+            attack2 = speed[c2] >= speed[c1] or hp2 >= hp1
+            if attack1 and attack2 and fast_forward:
+                # Both attack and nobody swaps, so every turn until something changes costs the same hp.
+                # Skip the turns where both stay alive after the tick and both keep choosing to attack.
+                loss1 = damage[c2][c1] + 1
+                loss2 = damage[c1][c2] + 1
+                turns = min((hp1 - 1) // loss1, (hp2 - 1) // loss2)
+                # The slower monster only attacks while its hp is at least the faster one's.
+                if speed[c1] > speed[c2] and loss2 > loss1:
+                    turns = min(turns, (hp2 - hp1) // (loss2 - loss1) + 1)
+                elif speed[c2] > speed[c1] and loss1 > loss2:
+                    turns = min(turns, (hp1 - hp2) // (loss1 - loss2) + 1)
+                if turns > 0:
+                    hp1 -= turns * loss1
+                    hp2 -= turns * loss2
+                    self.fast_forwarded_turns += turns
+                    attack1 = speed[c1] >= speed[c2] or hp1 >= hp2
+                    attack2 = speed[c2] >= speed[c1] or hp2 >= hp1
+            if not attack1:
+                hp[out1] = hp1
+                add(0, out1)
+                out1 = retrieve(0)
+                c1 = cls_of[out1]
+                hp1 = hp[out1]
+            if not attack2:
+                hp[out2] = hp2
+                add(1, out2)
+                out2 = retrieve(1)
+                c2 = cls_of[out2]
+                hp2 = hp[out2]
+
+            speed1 = speed[c1]
+            speed2 = speed[c2]
+            if speed1 > speed2:
+                hp2 -= damage[c1][c2]
+                if hp2 > 0 and attack2:
+                    hp1 -= damage[c2][c1]
+            elif speed2 > speed1:
+                hp1 -= damage[c2][c1]
+                if hp1 > 0 and attack1:
+                    hp2 -= damage[c1][c2]
+            else:
+                hp2 -= damage[c1][c2]
+                hp1 -= damage[c2][c1]
+
+            if hp1 > 0 and hp2 > 0:
+                hp1 -= 1
+                hp2 -= 1
+                if hp1 > 0 and hp2 > 0:
+                    continue
+
+            result = None
+            if hp1 <= 0 and hp2 <= 0:
+                if queue1 and queue2:
+                    hp[out1] = hp1
+                    hp[out2] = hp2
+                    out1 = retrieve(0)
+                    out2 = retrieve(1)
+                    c1 = cls_of[out1]
+                    c2 = cls_of[out2]
+                    hp1 = hp[out1]
+                    hp2 = hp[out2]
+                elif queue1:
+                    result = Battle.Result.TEAM1
+                elif queue2:
+                    result = Battle.Result.TEAM2
+                else:
+                    result = Battle.Result.DRAW
+            elif hp2 <= 0:
+                if not queue2:
+                    result = Battle.Result.TEAM1
+                else:
+                    hp[out2] = hp2
+                    out2 = retrieve(1)
+                    c2 = cls_of[out2]
+                    hp2 = hp[out2]
+                    # Simple mode stats do not depend on level, so levelling up keeps the hp.
+                    level[out1] += 1
+                    if evolution[c1] != -1 and level[out1] > original_level[out1]:
+                        evolved = evolution[c1]
+                        hp1 = max_hp[evolved] - (max_hp[c1] - hp1)
+                        c1 = evolved
+                        cls_of[out1] = evolved
+                        original_level[out1] = level[out1]
+            else:
+                if not queue1:
+                    result = Battle.Result.TEAM2
+                else:
+                    hp[out1] = hp1
+                    out1 = retrieve(0)
+                    c1 = cls_of[out1]
+                    hp1 = hp[out1]
+                    level[out2] += 1
+                    if evolution[c2] != -1 and level[out2] > original_level[out2]:
+                        evolved = evolution[c2]
+                        hp2 = max_hp[evolved] - (max_hp[c2] - hp2)
+                        c2 = evolved
+                        cls_of[out2] = evolved
+                        original_level[out2] = level[out2]
+            if result is not None:
+                break
+
+        hp[out1] = hp1
+        hp[out2] = hp2
+        self.turn_number = turn_number + self.fast_forwarded_turns
+
+        # Write the final state back into real monsters and containers.
+        def materialise(slot: int) -> MonsterBase:
+            monster = monsters[slot]
+            monster_class = self._fast_classes[cls_of[slot]]
+            if type(monster) is not monster_class:
+                monster = monster_class(monster.simple_mode, original_level[slot])
+            monster.level = level[slot]
+            monster.original_level = original_level[slot]
+            monster.set_hp(hp[slot])
+            return monster
+
+        for side, team in enumerate((team1, team2)):
+            fill_team(team, [materialise(slot) for slot in queues[side]], keys[side], descending[side])
+        self.out1 = materialise(out1)
+        self.out2 = materialise(out2)
         return result
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+"""
+Bounded LRU cache of battle outcomes, keyed by battle_state encodings.
+
+With the default MonsterTeam.choose_action a battle is fully determined by its state, so the
+result and the final state of a battle only need to be computed once per starting state.
+
+Usage:
+```
+cache = OutcomeCache(maxsize=10000)
+b = Battle(cache=cache)
+...
+print(cache.stats())
+```
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Optional
+
+
+class OutcomeCache:
+    """
+    Maps battle states to (result, final battle state).
+
+    Attributes:
+        maxsize (int): number of entries kept, least recently used entries are evicted first
+        per_turn (bool): whether battles also look up and store the state of every turn,
+            not only the starting state
+        hits, misses, evictions (int): counters since creation or the last reset_stats()
+    """
+
+    DEFAULT_MAXSIZE = 4096
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, per_turn: bool = False) -> None:
+        if maxsize <= 0:
+            raise ValueError("Cache size should be positive.")
+        self.maxsize = maxsize
+        self.per_turn = per_turn
+        self.entries = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        """
+        Returns the (result, final state) stored for key, or None.
+        :complexity: O(1) amortised, plus hashing the key.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, result, final_state: tuple) -> None:
+        """:complexity: O(1) amortised, plus hashing the key."""
+        self.entries[key] = (result, final_state)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+        }
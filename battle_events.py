@@ -0,0 +1,197 @@
+"""
+Structured battle event stream.
+
+Battles emit events as fixed-width integer records into a preallocated ring buffer
+(EventRecorder). Nothing is formatted as text unless a sink asks for it: when the buffer fills
+up, the records are handed to the recorder's sinks, e.g. a JsonlSink or a compact BinarySink.
+
+Every record is RECORD_WIDTH int64 values: (event type, turn, team, a, b), where a and b depend
+on the event type:
+
+    TURN_START  team 0, a 0,               b 0
+    ACTION      team 1/2, a action value,  b 0
+    ATTACK      team of the attacker, a damage dealt, b defender hp afterwards
+    FAINT       team, a monster id,        b 0
+    LEVEL_UP    team, a monster id,        b new level
+    EVOLVE      team, a old monster id,    b new monster id
+    RETRIEVE    team, a monster id,        b hp
+    RESULT      team 0, a result value,    b number of turns
+
+Monster ids come from helpers.get_monster_id, and are -1 for classes outside the catalog.
+
+Usage:
+```
+with BinarySink("battles.bin") as sink:
+    recorder = EventRecorder(sinks=[sink])
+    b = Battle(events=recorder)
+    b.battle(team1, team2)
+    recorder.flush()
+```
+"""
+from __future__ import annotations
+
+import json
+from array import array
+from enum import auto
+from typing import BinaryIO, Iterable, TextIO, Union
+
+from base_enum import BaseEnum
+from helpers import get_monster_id
+
+
+class EventType(BaseEnum):
+    TURN_START = auto()
+    ACTION = auto()
+    ATTACK = auto()
+    FAINT = auto()
+    LEVEL_UP = auto()
+    EVOLVE = auto()
+    RETRIEVE = auto()
+    RESULT = auto()
+
+
+RECORD_WIDTH = 5
+FIELDS = ("type", "turn", "team", "a", "b")
+
+_monster_ids = {}
+
+
+def monster_id(monster) -> int:
+    """Catalog id of a monster instance's class, or -1 for classes outside the catalog."""
+    monster_class = type(monster)
+    if monster_class not in _monster_ids:
+        try:
+            _monster_ids[monster_class] = get_monster_id(monster_class)
+        except ValueError:
+            _monster_ids[monster_class] = -1
+    return _monster_ids[monster_class]
+
+
+class EventSink:
+    """Receives batches of records from an EventRecorder. Subclasses implement write."""
+
+    def write(self, records: memoryview, count: int) -> None:
+        """records holds count * RECORD_WIDTH int64 values, and is only valid during the call."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> EventSink:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonlSink(EventSink):
+    """Writes one JSON object per event, with the event type by name."""
+
+    def __init__(self, target: Union[str, TextIO]) -> None:
+        self.owns_file = isinstance(target, str)
+        self.file = open(target, "w") if self.owns_file else target
+        self.names = {event_type.value: event_type.name for event_type in EventType}
+
+    def write(self, records: memoryview, count: int) -> None:
+        lines = []
+        for i in range(0, count * RECORD_WIDTH, RECORD_WIDTH):
+            event = dict(zip(FIELDS, records[i:i + RECORD_WIDTH]))
+            event["type"] = self.names[event["type"]]
+            lines.append(json.dumps(event))
+        if lines:
+            self.file.write("\n".join(lines) + "\n")
+
+    def close(self) -> None:
+        if self.owns_file:
+            self.file.close()
+
+
+class BinarySink(EventSink):
+    """Writes the raw int64 records, in native byte order. read_binary loads them back."""
+
+    def __init__(self, target: Union[str, BinaryIO]) -> None:
+        self.owns_file = isinstance(target, str)
+        self.file = open(target, "wb") if self.owns_file else target
+
+    def write(self, records: memoryview, count: int) -> None:
+        self.file.write(records[:count * RECORD_WIDTH])
+
+    def close(self) -> None:
+        if self.owns_file:
+            self.file.close()
+
+
+def read_binary(path: str) -> list[tuple[int, ...]]:
+    """Loads the records written by a BinarySink as tuples."""
+    values = array("q")
+    with open(path, "rb") as f:
+        values.frombytes(f.read())
+    return [tuple(values[i:i + RECORD_WIDTH]) for i in range(0, len(values), RECORD_WIDTH)]
+
+
+class EventRecorder:
+    """
+    Preallocated ring buffer of event records.
+
+    When the buffer is full it is flushed to the sinks and reused. Without sinks it simply wraps
+    around, so records() always returns the most recent events.
+
+    Attributes:
+        capacity (int): number of records the buffer holds
+        total (int): number of events emitted since creation
+    """
+
+    DEFAULT_CAPACITY = 4096
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, sinks: Iterable[EventSink] = ()) -> None:
+        if capacity <= 0:
+            raise ValueError("Capacity should be positive.")
+        self.capacity = capacity
+        self.sinks = list(sinks)
+        self.buffer = array("q", bytes(8 * RECORD_WIDTH * capacity))
+        self.view = memoryview(self.buffer)
+        self.position = 0
+        self.total = 0
+        self.wrapped = False
+
+    def emit(self, event_type: int, turn: int, team: int, a: int, b: int) -> None:
+        """
+        Stores one record. event_type is an EventType value.
+        :complexity: O(1), plus a flush to the sinks every capacity events.
+        """
+        buffer = self.buffer
+        i = self.position * RECORD_WIDTH
+        buffer[i] = event_type
+        buffer[i + 1] = turn
+        buffer[i + 2] = team
+        buffer[i + 3] = a
+        buffer[i + 4] = b
+        self.total += 1
+        self.position += 1
+        if self.position == self.capacity:
+            if self.sinks:
+                self.flush()
+            else:
+                self.position = 0
+                self.wrapped = True
+
+    def flush(self) -> None:
+        """Hands every buffered record to the sinks and empties the buffer."""
+        for sink in self.sinks:
+            sink.write(self.view, self.position)
+        self.position = 0
+        self.wrapped = False
+
+    def records(self) -> list[tuple[int, ...]]:
+        """The buffered records, oldest first."""
+        end = self.position * RECORD_WIDTH
+        values = self.buffer.tolist()
+        if self.wrapped:
+            values = values[end:] + values[:end]
+        else:
+            values = values[:end]
+        return [tuple(values[i:i + RECORD_WIDTH]) for i in range(0, len(values), RECORD_WIDTH)]
+
+    def clear(self) -> None:
+        self.position = 0
+        self.wrapped = False
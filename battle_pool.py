@@ -0,0 +1,170 @@
+"""
+Runs many battles across a pool of worker processes.
+
+Teams travel to the workers as MonsterTeam specs (team mode, sort key and monster ids), not as
+pickled team objects, so every battle starts from the regenerated team. Results always come back
+in input order, whatever the number of workers.
+
+Usage:
+```
+results = battle_many([(team1, team2), (spec3, spec4)], workers=4, seed=1008)
+```
+"""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, Iterator, Optional, Union
+
+from battle import Battle
+from battle_state import encode_battle
+from helpers import get_all_monsters, get_monster_by_id, get_monster_id
+from random_gen import RandomGen
+from team import MonsterTeam
+
+TeamSpec = tuple[int, int, tuple[int, ...]]
+
+DEFAULT_CHUNK_SIZE = 64
+
+
+def init_worker() -> None:
+    """
+    Pool initializer. Loads the monster catalog and fills the simulate_fast class tables once
+    per process, so no battle pays for it.
+    """
+    monsters = get_all_monsters()
+    for i in range(len(monsters)):
+        Battle._fast_class(monsters[i])
+
+
+def as_spec(team: Union[MonsterTeam, TeamSpec]) -> TeamSpec:
+    """Returns the spec of a team, or the argument itself if it already is one."""
+    if isinstance(team, MonsterTeam):
+        return team.to_spec()
+    return team
+
+
+def run_chunk(chunk: list[tuple[int, TeamSpec, TeamSpec]], seed: Optional[int], final_states: bool = False) -> list:
+    """
+    Battles every (index, spec1, spec2) of a chunk and returns the Battle.Result values in order.
+    With a seed, RandomGen is reseeded to seed + index before each battle, so a battle sees the same
+    random numbers no matter which worker runs it.
+    With final_states, each entry is (result value, turn number, battle_state.encode_battle) at the
+    end of the battle instead, so the caller can put its own teams in the state the battle left them.
+    """
+    engine = Battle(verbosity=0)
+    results = []
+    for index, spec1, spec2 in chunk:
+        if seed is not None:
+            RandomGen.set_seed(seed + index)
+        team1 = MonsterTeam.from_spec(spec1)
+        team2 = MonsterTeam.from_spec(spec2)
+        value = engine.simulate_fast(team1, team2).value
+        if final_states:
+            results.append((value, engine.turn_number, _map_classes(encode_battle(engine), get_monster_id)))
+        else:
+            results.append(value)
+    return results
+
+
+def _map_classes(state: tuple, convert) -> tuple:
+    """
+    A battle_state.encode_battle state with every monster class passed through convert. Monster classes
+    are built at run time and cannot be pickled, so states cross processes with catalog ids instead.
+    """
+    def monster(member):
+        return (convert(member[0]),) + member[1:]
+
+    def team(team_state):
+        return team_state[:3] + (tuple(monster(member) for member in team_state[3]),)
+
+    return (team(state[0]), team(state[1]), monster(state[2]), monster(state[3]))
+
+
+def _chunks(pairs_or_specs: Iterable, chunk_size: int):
+    """Groups the input into lists of (index, spec1, spec2)."""
+    chunk = []
+    for index, (team1, team2) in enumerate(pairs_or_specs):
+        chunk.append((index, as_spec(team1), as_spec(team2)))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _submit_ahead(pool: ProcessPoolExecutor, chunks, seed: Optional[int], final_states: bool, lookahead: int):
+    """
+    Yields the results of every chunk in order, with at most lookahead chunks submitted and not yet
+    yielded. A chunk is only taken from the input when there is room for it.
+    """
+    futures = deque()
+    for chunk in chunks:
+        futures.append(pool.submit(run_chunk, chunk, seed, final_states))
+        if len(futures) >= lookahead:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
+def make_pool(workers: int) -> ProcessPoolExecutor:
+    """A process pool whose workers are set up by init_worker, for battle_many's pool argument."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+
+
+def battle_stream(
+    pairs_or_specs: Iterable[tuple[Union[MonsterTeam, TeamSpec], Union[MonsterTeam, TeamSpec]]],
+    seed: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pool: Optional[ProcessPoolExecutor] = None,
+    final_states: bool = False,
+    lookahead: Optional[int] = None,
+) -> Iterator:
+    """
+    Yields the result of every pair, in input order, as soon as its chunk is done. With a pool, every
+    chunk is submitted straight away, so the workers keep battling while the caller consumes results.
+    With a lookahead as well, at most that many chunks are in flight, and more are only submitted as
+    results are consumed, so a caller that stops early has not paid for the whole input.
+    Without a pool, each chunk is battled in this process when the caller gets to it.
+    With final_states, yields (result, turn number, final battle state) instead, see run_chunk.
+    """
+    chunks = _chunks(pairs_or_specs, chunk_size)
+    if pool is not None and lookahead is not None:
+        chunk_results = _submit_ahead(pool, chunks, seed, final_states, max(lookahead, 1))
+    elif pool is not None:
+        # map yields in submission order, which keeps the merge deterministic.
+        chunk_results = pool.map(run_chunk, chunks, repeat(seed), repeat(final_states))
+    else:
+        init_worker()
+        chunk_results = (run_chunk(chunk, seed, final_states) for chunk in chunks)
+    for results in chunk_results:
+        for entry in results:
+            if final_states:
+                yield (Battle.Result(entry[0]), entry[1], _map_classes(entry[2], get_monster_by_id))
+            else:
+                yield Battle.Result(entry)
+
+
+def battle_many(
+    pairs_or_specs: Iterable[tuple[Union[MonsterTeam, TeamSpec], Union[MonsterTeam, TeamSpec]]],
+    workers: int = 1,
+    seed: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> list[Battle.Result]:
+    """
+    Battles every pair and returns the results in input order.
+
+    :workers: number of worker processes. 1 or fewer runs in this process, through the same code path.
+    :seed: base seed for per-battle reseeding, see run_chunk.
+    :chunk_size: number of battles sent to a worker at a time.
+    :pool: an open pool from make_pool to run on instead of starting one, so that callers running
+        many batches only pay for the worker start up once. workers is ignored when it is given.
+
+    Complexity: O(B x battle / workers) wall time for B battles, plus O(B) to merge the results.
+    """
+    if pool is not None or workers <= 1:
+        return list(battle_stream(pairs_or_specs, seed, chunk_size, pool))
+    with make_pool(workers) as pool:
+        return list(battle_stream(pairs_or_specs, seed, chunk_size, pool))
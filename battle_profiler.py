@@ -0,0 +1,139 @@
+"""
+Opt-in counters and timers for the phases of Battle.process_turn.
+
+A PhaseProfiler attached to a Battle wraps that instance's phase methods. Nothing is wrapped until
+attach is called, and detach removes the wrappers again, so a battle that is not profiled runs
+exactly the code it always did. The wrappers are bound to the attached battle, so Battle.fork
+detaches them from its copy: forks (such as LookaheadPolicy's search) are not profiled.
+
+Phases, and the Battle method each one times:
+    choose_action   choose_action (a team's choose_action or policy)
+    swap            _swap         (a SWAP or SPECIAL action, without the retrieve)
+    attack          _attack       (one monster attacking, including the effectiveness lookup)
+    tick            _tick         (the end of turn hp loss)
+    faint           _faint        (end of game checks after a faint, without retrieve and level up)
+    retrieve        _retrieve     (taking the next monster out of a team)
+    level_up        _level_up     (without evolve)
+    evolve          _evolve
+
+Times are exclusive: a phase called from another phase is only counted in the inner one.
+
+Usage:
+```
+profiler = PhaseProfiler()
+b = profiler.attach(Battle())
+tower = BattleTower(b)
+...
+profiler.last_battle    # {"choose_action": {"calls": 48, "seconds": 0.0001}, ...}
+profiler.stats()        # the same, summed over every battle since attach or reset
+```
+"""
+from __future__ import annotations
+
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from battle import Battle
+
+
+class PhaseProfiler:
+    """
+    Attributes:
+        battles (int): battles played by attached Battle instances since the last reset
+        turns (int): turns played in those battles
+        last_battle (dict): phase -> {"calls", "seconds"} for the most recent battle
+    """
+
+    PHASES = {
+        "choose_action": "choose_action",
+        "swap": "_swap",
+        "attack": "_attack",
+        "tick": "_tick",
+        "faint": "_faint",
+        "retrieve": "_retrieve",
+        "level_up": "_level_up",
+        "evolve": "_evolve",
+    }
+
+    def __init__(self) -> None:
+        self.calls = {}
+        self.seconds = {}
+        self.battle_calls = {}
+        self.battle_seconds = {}
+        # Time spent in nested phases, one entry per phase currently running.
+        self._inner = []
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Zeroes every count. The counters are cleared in place, since the wrappers of attached
+        battles hold on to them.
+        """
+        self.battles = 0
+        self.turns = 0
+        for phase in self.PHASES:
+            self.calls[phase] = 0
+            self.seconds[phase] = 0.0
+            self.battle_calls[phase] = 0
+            self.battle_seconds[phase] = 0.0
+        self.last_battle = self._as_dict(self.battle_calls, self.battle_seconds)
+        self._inner.clear()
+
+    def attach(self, battle: Battle) -> Battle:
+        """Starts profiling battle. Returns it, for chaining."""
+        for phase, method in self.PHASES.items():
+            setattr(battle, method, self._timed(phase, getattr(battle, method)))
+        setattr(battle, "battle", self._battle_wrapper(battle, getattr(battle, "battle")))
+        battle.profiler = self
+        return battle
+
+    def detach(self, battle: Battle) -> None:
+        """Stops profiling battle, restoring its class methods."""
+        for method in self.PHASES.values():
+            vars(battle).pop(method, None)
+        vars(battle).pop("battle", None)
+        battle.profiler = None
+
+    def _timed(self, phase: str, method):
+        calls = self.battle_calls
+        seconds = self.battle_seconds
+        inner = self._inner
+
+        def timed(*args):
+            inner.append(0.0)
+            start = perf_counter()
+            try:
+                return method(*args)
+            finally:
+                elapsed = perf_counter() - start
+                nested = inner.pop()
+                if inner:
+                    inner[-1] += elapsed
+                calls[phase] += 1
+                seconds[phase] += elapsed - nested
+        return timed
+
+    def _battle_wrapper(self, battle: Battle, method):
+        def battle_wrapper(team1, team2):
+            for phase in self.PHASES:
+                self.battle_calls[phase] = 0
+                self.battle_seconds[phase] = 0.0
+            try:
+                return method(team1, team2)
+            finally:
+                self.battles += 1
+                self.turns += battle.turn_number
+                for phase in self.PHASES:
+                    self.calls[phase] += self.battle_calls[phase]
+                    self.seconds[phase] += self.battle_seconds[phase]
+                self.last_battle = self._as_dict(self.battle_calls, self.battle_seconds)
+        return battle_wrapper
+
+    @staticmethod
+    def _as_dict(calls: dict, seconds: dict) -> dict:
+        return {phase: {"calls": calls[phase], "seconds": seconds[phase]} for phase in calls}
+
+    def stats(self) -> dict:
+        """phase -> {"calls", "seconds"} summed over every battle since the last reset."""
+        return self._as_dict(self.calls, self.seconds)
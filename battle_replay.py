@@ -0,0 +1,202 @@
+"""
+Deterministic recording and replay of battles.
+
+A BattleRecorder attached to a Battle keeps, for every battle it plays:
+* the RandomGen seed the battle started with,
+* the team specs (see MonsterTeam.to_spec) when the teams only hold catalog monsters,
+* the pair of actions chosen on every turn, packed into one byte per turn,
+* a checkpoint of the full battle state (see battle_state) every checkpoint_every turns.
+
+A BattleReplayer re-executes a recording without calling choose_action: the recorded actions are
+applied directly. seek(n) starts from the last checkpoint at or before turn n, so reaching a late
+turn of a long battle only replays the turns since that checkpoint.
+
+Usage:
+```
+recorder = BattleRecorder(checkpoint_every=16)
+tower = BattleTower(Battle(recorder=recorder))
+...
+replayer = BattleReplayer(recorder.last())
+battle = replayer.seek(40)   # the battle as it stood at the start of turn 40
+replayer.replay()            # the recorded result
+```
+"""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from typing import Optional
+
+from battle import Battle
+from battle_state import BattleState, encode_battle, decode_battle
+from random_gen import RandomGen
+from team import MonsterTeam
+
+from data_structures.referential_array import ArrayR
+
+
+class BattleRecording:
+    """
+    Everything needed to replay one battle.
+
+    Attributes:
+        seed (int): RandomGen.seed when the battle started
+        specs (tuple): the team specs of both teams, or None for teams holding non-catalog monsters
+        actions (array): one byte per turn, the team 1 action value in the high nibble and
+            the team 2 action value in the low nibble
+        checkpoints (dict): turn number -> (RandomGen.seed, battle state) at the start of that turn
+        checkpoint_every (int): turns between checkpoints
+        result (Battle.Result): the recorded result, None while the battle is running
+        turns (int): number of turns played
+        stalled (bool): whether the battle was cut short by Battle's stall guards
+    """
+
+    def __init__(self, seed: int, specs: Optional[tuple], checkpoint_every: int) -> None:
+        self.seed = seed
+        self.specs = specs
+        self.actions = array("B")
+        self.checkpoints: dict[int, tuple[int, BattleState]] = {}
+        self.checkpoint_every = checkpoint_every
+        self.result = None
+        self.turns = 0
+        self.stalled = False
+
+    def action_pair(self, turn: int) -> tuple[Battle.Action, Battle.Action]:
+        """:complexity: O(1)"""
+        code = self.actions[turn]
+        return Battle.Action(code >> 4), Battle.Action(code & 0xF)
+
+    def last_checkpoint(self, turn: int) -> int:
+        """
+        The latest checkpointed turn at or before turn.
+        :complexity: O(1), checkpoints are at multiples of checkpoint_every.
+        """
+        checkpoint = min(turn, self.turns) // self.checkpoint_every * self.checkpoint_every
+        while checkpoint not in self.checkpoints:
+            checkpoint -= self.checkpoint_every
+        return checkpoint
+
+
+class BattleRecorder:
+    """
+    Records the battles played by a Battle, see the module docstring.
+
+    Attributes:
+        checkpoint_every (int): turns between state checkpoints, smaller values make seeking faster
+            and recordings larger
+        recordings (deque): the recordings, oldest first, at most keep of them. A recorder attached
+            for a whole tower run would otherwise hold every battle it played, so only the last
+            DEFAULT_KEEP are kept unless keep is given; keep=None keeps them all.
+    """
+
+    DEFAULT_CHECKPOINT_EVERY = 32
+    DEFAULT_KEEP = 16
+
+    def __init__(self, checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY, keep: Optional[int] = DEFAULT_KEEP) -> None:
+        if checkpoint_every <= 0:
+            raise ValueError("Checkpoint interval should be positive.")
+        if keep is not None and keep <= 0:
+            raise ValueError("Number of recordings kept should be positive.")
+        self.checkpoint_every = checkpoint_every
+        self.recordings: deque[BattleRecording] = deque(maxlen=keep)
+        self.current: Optional[BattleRecording] = None
+
+    def start(self, battle: Battle) -> None:
+        """Called by Battle.battle once both monsters are out, before the first turn."""
+        try:
+            specs = (battle.team1.to_spec(), battle.team2.to_spec())
+        except ValueError:
+            specs = None
+        self.current = BattleRecording(RandomGen.seed, specs, self.checkpoint_every)
+        self.current.checkpoints[0] = (RandomGen.seed, encode_battle(battle))
+        self.recordings.append(self.current)
+
+    def checkpoint(self, battle: Battle) -> None:
+        """Called by Battle.battle at the start of every turn. :complexity: O(n) on checkpoint turns."""
+        if battle.turn_number > 0 and battle.turn_number % self.checkpoint_every == 0:
+            self.current.checkpoints[battle.turn_number] = (RandomGen.seed, encode_battle(battle))
+
+    def record_turn(self, action_team_1: Battle.Action, action_team_2: Battle.Action) -> None:
+        """Called by Battle.process_turn with the chosen actions. :complexity: O(1) amortised."""
+        self.current.actions.append(action_team_1.value << 4 | action_team_2.value)
+
+    def finish(self, battle: Battle, result: Battle.Result) -> None:
+        """Called by Battle.battle with the result."""
+        self.current.result = result
+        self.current.turns = len(self.current.actions)
+        self.current.stalled = battle.stalled
+        self.current = None
+
+    def last(self) -> BattleRecording:
+        return self.recordings[-1]
+
+
+class ReplayBattle(Battle):
+    """A Battle whose turns apply the actions of a recording instead of asking the teams."""
+
+    def __init__(self, recording: BattleRecording) -> None:
+        Battle.__init__(self, verbosity=0)
+        self.recording = recording
+
+    def choose_actions(self) -> tuple[Battle.Action, Battle.Action]:
+        return self.recording.action_pair(self.turn_number)
+
+
+class BattleReplayer:
+    """Re-executes a BattleRecording, see the module docstring."""
+
+    def __init__(self, recording: BattleRecording) -> None:
+        if recording.result is None:
+            raise ValueError("Cannot replay a battle that has not finished.")
+        self.recording = recording
+
+    def seek(self, turn: int) -> ReplayBattle:
+        """
+        Returns a battle in the state it was at the start of turn (clamped to the number of turns
+        played), with new team and monster instances. RandomGen is left seeded as it was then.
+        :complexity: O(c x turn) for c the cost of a turn, at most checkpoint_every turns are replayed.
+        """
+        recording = self.recording
+        turn = max(0, min(turn, recording.turns))
+        start = recording.last_checkpoint(turn)
+        seed, state = recording.checkpoints[start]
+        battle = ReplayBattle(recording)
+        battle.team1 = self._team(1, state)
+        battle.team2 = self._team(2, state)
+        decode_battle(battle, state)
+        RandomGen.set_seed(seed)
+        battle.turn_number = start
+        while battle.turn_number < turn:
+            battle.process_turn()
+            battle.turn_number += 1
+        return battle
+
+    def replay(self) -> Battle.Result:
+        """
+        Replays the whole battle and returns its result, which matches the recorded one for
+        battles that were not cut short by a stall guard.
+        """
+        battle = self.seek(0)
+        result = None
+        while result is None and battle.turn_number < self.recording.turns:
+            result = battle.process_turn()
+            battle.turn_number += 1
+        return Battle.Result.DRAW if result is None else result
+
+    def _team(self, side: int, state: BattleState) -> MonsterTeam:
+        """
+        A team for decode_battle to fill, with the mode and sort key of the encoded team. It is
+        built from the recorded spec when there is one, so regenerate_team still works on it.
+        """
+        if self.recording.specs is not None:
+            return MonsterTeam.from_spec(self.recording.specs[side - 1])
+        team_mode, sort_key, _, _ = state[side - 1]
+        # The team may be empty at this point, so it is built from its out monster and then refilled.
+        provided = ArrayR(1)
+        provided[0] = state[side + 1][0]
+        return MonsterTeam(
+            team_mode=MonsterTeam.TeamMode(team_mode),
+            selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+            sort_key=MonsterTeam.SortMode(sort_key) if sort_key else None,
+            provided_monsters=provided,
+        )
@@ -0,0 +1,144 @@
+"""
+Canonical, hashable encodings of teams and battles.
+
+A monster is encoded as (class, hp, level, original level) and a team as
+(team mode, sort key, descending, members), with the members in the order they sit in the team's
+container. Two teams with equal encodings behave identically under the default choose_action,
+which is what the outcome cache, stall detection and Battle.snapshot rely on. copy_team is the
+cheap alternative to copy.deepcopy for Battle.fork.
+
+Enums are stored by value, since BaseEnum defines __eq__ and is therefore not hashable.
+"""
+from __future__ import annotations
+
+import copy
+from typing import TYPE_CHECKING
+
+from monster_base import MonsterBase
+from team import MonsterTeam
+
+from data_structures.queue_adt import CircularQueue
+from data_structures.sorted_list_adt import ListItem
+
+if TYPE_CHECKING:
+    from battle import Battle
+
+MonsterState = tuple
+TeamState = tuple
+BattleState = tuple
+
+
+def team_members(team: MonsterTeam) -> list[MonsterBase]:
+    """
+    The monsters currently in a team, in the order they sit in its container
+    (bottom to top for FRONT, front to rear for BACK, ascending key for OPTIMISE).
+    :complexity: O(n) for n monsters in the team.
+    """
+    container = team.team
+    if team.team_mode == MonsterTeam.TeamMode.BACK:
+        return queue_items(container)
+    if team.team_mode == MonsterTeam.TeamMode.OPTIMISE:
+        return [container.array[i].value for i in range(len(container))]
+    return [container.array[i] for i in range(len(container))]
+
+
+def queue_items(queue: CircularQueue) -> list:
+    """The items of a circular queue, front to rear, without serving them. :complexity: O(n)"""
+    capacity = len(queue.array)
+    return [queue.array[(queue.front + i) % capacity] for i in range(len(queue))]
+
+
+def fill_team(team: MonsterTeam, monsters: list[MonsterBase], keys: list = None, descending: bool = True) -> None:
+    """
+    Replaces the contents of a team's container with monsters, given in container order.
+    OPTIMISE teams also take the sort keys, which are stored as given rather than recomputed,
+    and the descending flag.
+    :complexity: O(n) for n monsters.
+    """
+    container = team.team
+    container.clear()
+    if team.team_mode == MonsterTeam.TeamMode.OPTIMISE:
+        for i in range(len(monsters)):
+            container.array[i] = ListItem(value=monsters[i], key=keys[i])
+        container.length = len(monsters)
+        team.descending_checker = descending
+    elif team.team_mode == MonsterTeam.TeamMode.FRONT:
+        for monster in monsters:
+            container.push(monster)
+    else:
+        for monster in monsters:
+            container.append(monster)
+
+
+def copy_team(team: MonsterTeam) -> MonsterTeam:
+    """
+    An independent copy of a team: new containers holding shallow copies of its monsters.
+    Everything else (modes, sort key, an instance level choose_action) is shared with the original.
+    :complexity: O(n) for n monsters in the team, plus O(TEAM_LIMIT) for the new containers.
+    """
+    clone = copy.copy(team)
+    clone.team = type(team.team)(len(team.team.array))
+    clone.original_team = CircularQueue(len(team.original_team.array))
+    for monster_class in queue_items(team.original_team):
+        clone.original_team.append(monster_class)
+    monsters = [copy.copy(monster) for monster in team_members(team)]
+    keys = None
+    if team.team_mode == MonsterTeam.TeamMode.OPTIMISE:
+        keys = [team.team.array[i].key for i in range(len(team.team))]
+    fill_team(clone, monsters, keys, getattr(team, "descending_checker", True))
+    return clone
+
+
+def encode_monster(monster: MonsterBase) -> MonsterState:
+    return (type(monster), monster.get_hp(), monster.get_level(), monster.original_level)
+
+
+def decode_monster(state: MonsterState) -> MonsterBase:
+    """Builds a new monster instance from its encoding."""
+    monster_class, hp, level, original_level = state
+    monster = monster_class(True, original_level)
+    monster.level = level
+    monster.set_hp(hp)
+    return monster
+
+
+def encode_team(team: MonsterTeam) -> TeamState:
+    """:complexity: O(n) for n monsters in the team."""
+    if team.team_mode == MonsterTeam.TeamMode.OPTIMISE:
+        container = team.team
+        members = tuple(
+            encode_monster(container.array[i].value) + (container.array[i].key,)
+            for i in range(len(container))
+        )
+        return (team.team_mode.value, team.sort_key.value, team.descending_checker, members)
+    return (team.team_mode.value, 0, True, tuple(encode_monster(monster) for monster in team_members(team)))
+
+
+def decode_team(team: MonsterTeam, state: TeamState) -> None:
+    """
+    Writes an encoded team into an existing team of the same mode, with new monster instances.
+    :complexity: O(n) for n monsters in the encoding.
+    """
+    _, _, descending, members = state
+    monsters = [decode_monster(member[:4]) for member in members]
+    keys = [member[4] for member in members] if team.team_mode == MonsterTeam.TeamMode.OPTIMISE else None
+    fill_team(team, monsters, keys, descending)
+
+
+def encode_battle(battle: Battle) -> BattleState:
+    """Encodes a battle in progress: both teams and both out monsters."""
+    return (
+        encode_team(battle.team1),
+        encode_team(battle.team2),
+        encode_monster(battle.out1),
+        encode_monster(battle.out2),
+    )
+
+
+def decode_battle(battle: Battle, state: BattleState) -> None:
+    """Writes an encoded battle into battle.team1, battle.team2, battle.out1 and battle.out2."""
+    team1, team2, out1, out2 = state
+    decode_team(battle.team1, team1)
+    decode_team(battle.team2, team2)
+    battle.out1 = decode_monster(out1)
+    battle.out2 = decode_monster(out2)
@@ -0,0 +1,90 @@
+"""
+Compares the bulk ArrayR operations against the per-element loops they replaced.
+
+Each row times one operation on arrays of n references: building an empty array, from_list and
+to_list, copying everything into an array twice the size (an ArraySortedList resize) and shifting
+everything one place right (an ArraySortedList insert at the front). The per-element versions are
+copies of the code as it was before, driven through __getitem__/__setitem__.
+
+Run from the repository root:
+    python -m benchmarks.bench_array [max_length]
+"""
+import sys
+import time
+from ctypes import py_object
+
+from data_structures.referential_array import ArrayR
+
+
+def old_init(length: int) -> ArrayR:
+    array = ArrayR.__new__(ArrayR)
+    array.array = (length * py_object)()
+    array.array[:] = [None for _ in range(length)]
+    return array
+
+
+def old_from_list(l: list) -> ArrayR:
+    ret = ArrayR(len(l))
+    for x in range(len(l)):
+        ret[x] = l[x]
+    return ret
+
+
+def old_to_list(array: ArrayR) -> list:
+    ret = []
+    for x in range(len(array)):
+        ret.append(array[x])
+    return ret
+
+
+def old_resize(array: ArrayR) -> ArrayR:
+    new_array = ArrayR(2 * len(array))
+    for i in range(len(array)):
+        new_array[i] = array[i]
+    return new_array
+
+
+def old_shift(array: ArrayR) -> None:
+    for i in range(len(array) - 1, 0, -1):
+        array[i] = array[i - 1]
+
+
+def new_resize(array: ArrayR) -> ArrayR:
+    new_array = ArrayR(2 * len(array))
+    new_array.copy_range(array, 0, 0, len(array))
+    return new_array
+
+
+def new_shift(array: ArrayR) -> None:
+    array.copy_range(array, 0, 1, len(array) - 1)
+
+
+def best_of(function, argument, repeats: int) -> float:
+    """Fastest of repeats calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    max_length = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    n = 10 ** 3
+    while n <= max_length:
+        items = list(range(n))
+        array = ArrayR.from_list(items)
+        repeats = max(3, 10 ** 6 // n)
+        print(f"n = {n}")
+        for name, old, new, argument in (
+            ("init", old_init, ArrayR, n),
+            ("from_list", old_from_list, ArrayR.from_list, items),
+            ("to_list", old_to_list, ArrayR.to_list, array),
+            ("resize", old_resize, new_resize, array),
+            ("shift", old_shift, new_shift, array),
+        ):
+            before = best_of(old, argument, repeats)
+            after = best_of(new, argument, repeats)
+            print(f"  {name:>9}: per element {before * 1e3:9.3f}ms, bulk {after * 1e3:9.3f}ms ({before / after:5.1f}x)")
+        n *= 10
@@ -0,0 +1,51 @@
+"""
+Compares Battle.battle against Battle.simulate_fast on the same seeded random teams.
+
+Run from the repository root:
+    python -m benchmarks.bench_battle [n_battles]
+"""
+import sys
+import time
+
+from battle import Battle
+from random_gen import RandomGen
+from team import MonsterTeam
+
+MODES = [(MonsterTeam.TeamMode.FRONT, None), (MonsterTeam.TeamMode.BACK, None)]
+for sort_key in MonsterTeam.SortMode:
+    MODES.append((MonsterTeam.TeamMode.OPTIMISE, sort_key))
+
+
+def make_pairs(n: int, seed: int = 1008) -> list:
+    RandomGen.set_seed(seed)
+    pairs = []
+    for _ in range(n):
+        pair = []
+        for _ in range(2):
+            team_mode, sort_key = MODES[RandomGen.randint(0, len(MODES) - 1)]
+            pair.append(MonsterTeam(team_mode, MonsterTeam.SelectionMode.RANDOM, sort_key=sort_key))
+        pairs.append(pair)
+    return pairs
+
+
+def time_engine(n: int, fast: bool) -> float:
+    pairs = make_pairs(n)
+    b = Battle(verbosity=0)
+    start = time.perf_counter()
+    for team1, team2 in pairs:
+        if fast:
+            b.simulate_fast(team1, team2)
+        else:
+            b.battle(team1, team2)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    # Warm up the class tables so the timing only covers battles.
+    time_engine(10, fast=True)
+    slow = time_engine(n, fast=False)
+    fast = time_engine(n, fast=True)
+    print(f"battle():        {n} battles in {slow:.3f}s ({slow / n * 1e6:.1f} us/battle)")
+    print(f"simulate_fast(): {n} battles in {fast:.3f}s ({fast / n * 1e6:.1f} us/battle)")
+    print(f"speedup: {slow / fast:.1f}x")
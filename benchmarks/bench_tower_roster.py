@@ -0,0 +1,93 @@
+"""
+Shows that a BattleTower run costs linear time in the number of enemy teams.
+
+Battles are replaced by an engine that declares team 1 the winner straight away, so the timing
+covers the tower itself: serving and re-queueing enemy teams and regenerating them. Every enemy
+team is battled once (one pass over the roster). The same pass is also timed on a copy of the
+previous roster, which flipped an ArrayStack twice per battle, for the smaller sizes.
+
+Run from the repository root:
+    python -m benchmarks.bench_tower_roster [max_teams]
+"""
+import sys
+import time
+
+from battle import Battle
+from random_gen import RandomGen
+from team import MonsterTeam
+from tower import BattleTower
+
+from data_structures.referential_array import ArrayR
+from data_structures.stack_adt import ArrayStack
+from helpers import Flamikin
+
+# The stack-flipping roster is quadratic, so it is only timed up to this many teams
+# (10^4 teams already take it around 100s, against 0.2s for the queue).
+FLIP_LIMIT = 10 ** 3
+
+
+class InstantBattle(Battle):
+
+    def battle(self, team1: MonsterTeam, team2: MonsterTeam) -> Battle.Result:
+        return Battle.Result.TEAM1
+
+
+class FlipStackTower(BattleTower):
+    """The roster as it was before: an ArrayStack flipped twice per battle."""
+
+    def generate_teams(self, n: int) -> None:
+        BattleTower.generate_teams(self, n)
+        self.enemy_teams_stack = ArrayStack(n)
+        while len(self.enemy_teams):
+            self.enemy_teams_stack.push(self.enemy_teams.serve())
+        self.flip_stack()
+
+    def battles_remaining(self) -> bool:
+        return self.my_remaining_lifeforce > 0 and len(self.enemy_teams_stack) > 0
+
+    def next_battle(self):
+        self.my_team.regenerate_team()
+        enemy_team, enemy_remaining_lifeforce = self.enemy_teams_stack.pop()
+        enemy_team.regenerate_team()
+        battle_outcome = self.battle.battle(self.my_team, enemy_team)
+        enemy_remaining_lifeforce -= 1
+        self.flip_stack()
+        if enemy_remaining_lifeforce > 0:
+            self.enemy_teams_stack.push((enemy_team, enemy_remaining_lifeforce))
+        self.flip_stack()
+        return (battle_outcome, self.my_team, enemy_team, self.my_remaining_lifeforce, enemy_remaining_lifeforce)
+
+    def flip_stack(self) -> None:
+        new_stack = ArrayStack(self.enemy_capacity)
+        while len(self.enemy_teams_stack):
+            new_stack.push(self.enemy_teams_stack.pop())
+        self.enemy_teams_stack = new_stack
+
+
+def time_pass(tower_class: type[BattleTower], n: int) -> float:
+    """Seconds for n battles on a tower of n enemy teams."""
+    RandomGen.set_seed(1008)
+    tower = tower_class(InstantBattle(verbosity=0))
+    tower.set_my_team(MonsterTeam(
+        team_mode=MonsterTeam.TeamMode.BACK,
+        selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+        provided_monsters=ArrayR.from_list([Flamikin]),
+    ))
+    tower.generate_teams(n)
+    start = time.perf_counter()
+    for _ in range(n):
+        tower.next_battle()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    max_teams = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 5
+    n = 10 ** 3
+    while n <= max_teams:
+        queue = time_pass(BattleTower, n)
+        line = f"{n:>7} teams: queue roster {queue:.3f}s ({queue / n * 1e6:.1f} us/battle)"
+        if n <= FLIP_LIMIT:
+            flip = time_pass(FlipStackTower, n)
+            line += f", flipped stack {flip:.3f}s ({flip / n * 1e6:.1f} us/battle)"
+        print(line)
+        n *= 10
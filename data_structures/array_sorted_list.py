@@ -3,12 +3,35 @@
     Items to store should be of time ListItem.
 """
 
+from __future__ import annotations
+
+from typing import Callable, Iterable, Optional
+
 from data_structures.referential_array import ArrayR
 from data_structures.sorted_list_adt import *
 
 __author__ = 'Maria Garcia de la Banda and Brendon Taylor. Modified by Alexey Ignatiev and Graeme Gange'
 __docformat__ = 'reStructuredText'
 
+def _merge_runs(src: ArrayR[ListItem], lo: int, mid: int, hi: int, dst: ArrayR[ListItem]) -> None:
+    """ Merges the sorted runs src[lo:mid] and src[mid:hi] into dst[lo:hi].
+        On equal keys the item of the first run goes first, so merging is stable.
+        :complexity: O(hi - lo)
+    """
+    i, j, k = lo, mid, lo
+    while i < mid and j < hi:
+        if src[j].key < src[i].key:
+            dst[k] = src[j]
+            j += 1
+        else:
+            dst[k] = src[i]
+            i += 1
+        k += 1
+    # One run is used up, the rest of the other is copied as a block.
+    dst.copy_range(src, i, k, mid - i)
+    dst.copy_range(src, j, k + mid - i, hi - j)
+
+
 class ArraySortedList(SortedList[T]):
     """ SortedList ADT implemented with arrays. """
     MIN_CAPACITY = 1
@@ -23,6 +46,47 @@ class ArraySortedList(SortedList[T]):
         size = max(self.MIN_CAPACITY, max_capacity)
         self.array:ArrayR[ListItem] = ArrayR(size)
 
+    @classmethod
+    def from_items(cls, items: Iterable, key: Optional[Callable] = None) -> ArraySortedList:
+        """ Builds a sorted list of all items at once, with key(item) as the key of each.
+            Without key, items should already be ListItems.
+            Items with equal keys keep their input order.
+            :complexity: O(n log n) for n items, against O(n^2) shifts for n calls to add.
+        """
+        items = ArrayR.from_list(items)
+        n = len(items)
+        if key is not None:
+            for i in range(n):
+                items[i] = ListItem(items[i], key(items[i]))
+
+        # Bottom-up merge sort, swapping between two arrays.
+        src, dst = items, ArrayR(n)
+        width = 1
+        while width < n:
+            for lo in range(0, n, 2 * width):
+                _merge_runs(src, lo, min(lo + width, n), min(lo + 2 * width, n), dst)
+            src, dst = dst, src
+            width *= 2
+
+        sorted_list = cls(n)
+        sorted_list.array.copy_range(src, 0, 0, n)
+        sorted_list.length = n
+        return sorted_list
+
+    def merge(self, other: ArraySortedList) -> None:
+        """ Adds every item of other to this list. other is left as it was.
+            On equal keys the items already in this list go first.
+            :complexity: O(n + m) for n items here and m in other.
+        """
+        n, m = len(self), len(other)
+        both = ArrayR(n + m)
+        both.copy_range(self.array, 0, 0, n)
+        both.copy_range(other.array, 0, n, m)
+        merged = ArrayR(max(self.MIN_CAPACITY, n + m))
+        _merge_runs(both, 0, n, n + m, merged)
+        self.array = merged
+        self.length = n + m
+
     def reset(self):
         """ Reset the list. """
         SortedList.__init__(self)
@@ -58,13 +122,11 @@ class ArraySortedList(SortedList[T]):
 
     def _shuffle_right(self, index: int) -> None:
         """ Shuffle items to the right up to a given position. """
-        for i in range(len(self), index, -1):
-            self.array[i] = self.array[i - 1]
+        self.array.copy_range(self.array, index, index + 1, len(self) - index)
 
     def _shuffle_left(self, index: int) -> None:
         """ Shuffle items starting at a given position to the left. """
-        for i in range(index, len(self)):
-            self.array[i] = self.array[i + 1]
+        self.array.copy_range(self.array, index + 1, index, len(self) - index)
 
     def _resize(self) -> None:
         """ Resize the list. """
@@ -72,8 +134,7 @@ class ArraySortedList(SortedList[T]):
         new_array = ArrayR(2 * len(self.array))
 
         # copying the contents
-        for i in range(self.length):
-            new_array[i] = self.array[i]
+        new_array.copy_range(self.array, 0, 0, self.length)
 
         # referring to the new array
         self.array = new_array
@@ -0,0 +1,48 @@
+""" Stable counting sort of an ArrayR by small integer keys.
+
+Keys must lie in a known range [min_key, max_key]. Sorting n items over a range of k keys
+takes O(n + k), with no comparisons between items, and items with equal keys keep the
+order they had in the input.
+"""
+from __future__ import annotations
+
+__docformat__ = "reStructuredText"
+
+from typing import Callable, TypeVar
+
+from data_structures.referential_array import ArrayR
+
+T = TypeVar("T")
+
+
+def bucket_sort(array: ArrayR[T], key: Callable[[T], int], min_key: int, max_key: int) -> ArrayR[T]:
+    """ Returns a new ArrayR with the items of array sorted by key, ascending and stable.
+    :complexity: O(n x key + k) for n items and k = max_key - min_key + 1 keys.
+    :raises ValueError: if a key is outside [min_key, max_key].
+    """
+    if max_key < min_key:
+        raise ValueError("max_key should not be smaller than min_key.")
+    n = len(array)
+    keys = ArrayR(n)
+    counts = ArrayR(max_key - min_key + 1)
+    counts.fill(0)
+    for i in range(n):
+        item_key = key(array[i])
+        if not min_key <= item_key <= max_key:
+            raise ValueError(f"Key {item_key} is outside [{min_key}, {max_key}].")
+        keys[i] = item_key - min_key
+        counts[keys[i]] += 1
+
+    # Turn the counts into the position each bucket starts at.
+    start = 0
+    for bucket in range(len(counts)):
+        count = counts[bucket]
+        counts[bucket] = start
+        start += count
+
+    # Walking the input forwards keeps equal keys in their input order.
+    out = ArrayR(n)
+    for i in range(n):
+        out[counts[keys[i]]] = array[i]
+        counts[keys[i]] += 1
+    return out
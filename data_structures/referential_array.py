@@ -14,6 +14,18 @@ space to hold the references.
 Note that while I do check the precondition in __init__ (noone else
 would), I do not check that of getitem or setitem, since that is already
 checked by self.array[index].
+
+Bulk operations (slices, copy_range, fill, from_list, to_list and
+iteration) hand whole ranges to the ctypes array in one call, rather than
+going through __getitem__/__setitem__ once per element. They are still
+O(n) but run at C speed, which is what resizing and shuffling containers
+spend most of their time on.
+
+ArrayInt and ArrayFloat have the same interface for numbers only. They
+keep their values unboxed in one contiguous array.array (8 bytes each,
+against a reference plus a boxed object for ArrayR) and start as zeros
+rather than None. Their memory can be shared without copying: memoryview()
+gives a buffer view, and numpy.asarray gives an ndarray over the same memory.
 """
 __author__ = """
 Julian Garcia for the __init__ code, Maria Garcia de la Banda for the rest.
@@ -21,8 +33,9 @@ Modified by Jackson Goerner
 """
 __docformat__ = "reStructuredText"
 
+from array import array
 from ctypes import py_object
-from typing import TypeVar, Generic
+from typing import Iterable, Iterator, Optional, TypeVar, Generic
 
 T = TypeVar("T")
 
@@ -36,7 +49,7 @@ class ArrayR(Generic[T]):
         if length < 0:
             raise ValueError("Array length should be larger than or equal to 0.")
         self.array = (length * py_object)()  # initialises the space
-        self.array[:] = [None for _ in range(length)]
+        self.array[:] = [None] * length
 
     def __len__(self) -> int:
         """Returns the length of the array
@@ -46,18 +59,46 @@ class ArrayR(Generic[T]):
 
     def __getitem__(self, index: int) -> T:
         """Returns the object in position index.
-        :complexity: O(1)
+        A slice returns a list of the objects in it.
+        :complexity: O(1), O(slice length) for a slice
         :pre: index in between 0 and length - self.array[] checks it
         """
         return self.array[index]
 
     def __setitem__(self, index: int, value: T) -> None:
         """Sets the object in position index to value
-        :complexity: O(1)
+        A slice is set from a sequence of the same length.
+        :complexity: O(1), O(slice length) for a slice
         :pre: index in between 0 and length - self.array[] checks it
         """
         self.array[index] = value
 
+    def __iter__(self) -> Iterator[T]:
+        """Iterates over the objects in the array, in order.
+        :complexity: O(1) per object
+        """
+        return iter(self.array[:])
+
+    def copy_range(self, src: ArrayR[T], src_start: int, dst_start: int, n: int) -> None:
+        """Copies the n objects of src starting at src_start into this array, starting at dst_start.
+        src may be this array, and the ranges may overlap (like memmove).
+        :complexity: O(n)
+        :raises IndexError: if either range does not fit in its array.
+        """
+        if n < 0 or src_start < 0 or dst_start < 0 or src_start + n > len(src) or dst_start + n > len(self):
+            raise IndexError("Range out of bounds.")
+        # The right hand side is read into a list before anything is written.
+        self.array[dst_start:dst_start + n] = src.array[src_start:src_start + n]
+
+    def fill(self, value: T, start: int = 0, end: Optional[int] = None) -> None:
+        """Sets every position from start up to (not including) end to value.
+        :complexity: O(end - start)
+        """
+        end = len(self) if end is None else end
+        if start < 0 or start > end or end > len(self):
+            raise IndexError("Range out of bounds.")
+        self.array[start:end] = [value] * (end - start)
+
     def index(self, item: T) -> T:
         for index, arr_item in enumerate(self.array):
             if arr_item == item:
@@ -75,14 +116,96 @@ class ArrayR(Generic[T]):
         return ret_str
 
     @classmethod
-    def from_list(cls, l: list[T]) -> ArrayR[T]:
+    def from_list(cls, l: Iterable[T]) -> ArrayR[T]:
+        if not isinstance(l, list):
+            l = list(l)
         ret = ArrayR(len(l))
-        for x in range(len(l)):
-            ret[x] = l[x]
+        ret.array[:] = l
         return ret
 
     def to_list(self) -> list[T]:
-        ret = []
-        for x in range(len(self)):
-            ret.append(self[x])
+        return self.array[:]
+
+
+class _ArrayNumeric(ArrayR[T]):
+    """Base of the typed arrays: an ArrayR over an array.array of TYPECODE values."""
+    TYPECODE = ""
+
+    def __init__(self, length: int) -> None:
+        """Creates an array of the given length, all zeros.
+        :complexity: O(length)
+        """
+        if length < 0:
+            raise ValueError("Array length should be larger than or equal to 0.")
+        self.array = array(self.TYPECODE, bytes(length * array(self.TYPECODE).itemsize))
+
+    def __getitem__(self, index: int) -> T:
+        """Returns the value in position index.
+        A slice returns a list of the values in it, as for ArrayR.
+        :complexity: O(1), O(slice length) for a slice
+        """
+        if isinstance(index, slice):
+            return self.array[index].tolist()
+        return self.array[index]
+
+    def __setitem__(self, index: int, value: T) -> None:
+        """Sets the value in position index.
+        A slice is set from a sequence of the same length.
+        :complexity: O(1), O(slice length) for a slice
+        :raises ValueError: if a slice is given a sequence of another length.
+        """
+        if isinstance(index, slice):
+            if not isinstance(value, array) or value.typecode != self.TYPECODE:
+                value = array(self.TYPECODE, value)
+            if len(value) != len(range(*index.indices(len(self)))):
+                # array.array would grow or shrink, the length of an ArrayR is fixed.
+                raise ValueError("Can only assign sequence of same size")
+        self.array[index] = value
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.array)
+
+    def copy_range(self, src: ArrayR[T], src_start: int, dst_start: int, n: int) -> None:
+        if n < 0 or src_start < 0 or dst_start < 0 or src_start + n > len(src) or dst_start + n > len(self):
+            raise IndexError("Range out of bounds.")
+        self[dst_start:dst_start + n] = src.array[src_start:src_start + n]
+
+    def fill(self, value: T, start: int = 0, end: Optional[int] = None) -> None:
+        end = len(self) if end is None else end
+        if start < 0 or start > end or end > len(self):
+            raise IndexError("Range out of bounds.")
+        self.array[start:end] = array(self.TYPECODE, [value]) * (end - start)
+
+    @classmethod
+    def from_list(cls, l: Iterable[T]) -> _ArrayNumeric[T]:
+        ret = cls(0)
+        ret.array = array(cls.TYPECODE, l)
         return ret
+
+    def to_list(self) -> list[T]:
+        return self.array.tolist()
+
+    def memoryview(self) -> memoryview:
+        """A view of the values, sharing their memory.
+        :complexity: O(1)
+        """
+        return memoryview(self.array)
+
+    def __array__(self, dtype=None, copy=None):
+        """numpy.asarray(self) is an ndarray over the same memory, unless a copy or another dtype is asked for."""
+        import numpy
+
+        values = numpy.frombuffer(self.array, dtype=self.array.typecode)
+        if dtype is not None and numpy.dtype(dtype) != values.dtype:
+            return values.astype(dtype)
+        return values.copy() if copy else values
+
+
+class ArrayInt(_ArrayNumeric[int]):
+    """Array of signed 64 bit integers."""
+    TYPECODE = "q"
+
+
+class ArrayFloat(_ArrayNumeric[float]):
+    """Array of double precision floats."""
+    TYPECODE = "d"
@@ -5,7 +5,7 @@ from typing import Optional
 
 from base_enum import BaseEnum
 
-from data_structures.referential_array import ArrayR
+from data_structures.referential_array import ArrayR, ArrayFloat
 
 class Element(BaseEnum):
     """
@@ -141,7 +141,7 @@ class EffectivenessCalculator:
             header = header.split(",")
             rest = rest.replace("\n", ",").split(",")
             a_header = ArrayR(len(header))
-            a_all = ArrayR(len(rest))
+            a_all = ArrayFloat(len(rest))
             for i in range(len(header)):
                 a_header[i] = header[i]
             for i in range(len(rest)):
@@ -9,6 +9,7 @@ if TYPE_CHECKING:
 
 
 _monsters: ArrayR[MonsterBase] = None
+_monster_ids: dict = None
 
 
 def MonsterBaseFactory(name, description, evolution, element, simple_stats, complex_stats, can_be_spawned) -> type[MonsterBase]:
@@ -29,6 +30,44 @@ def get_all_monsters():
         _make_all_monster_classes()
     return _monsters
 
+def get_monster_id(monster_class: type[MonsterBase]) -> int:
+    """
+    Position of a monster class in get_all_monsters(), used as a compact id.
+    :raises ValueError: if the class is not one of the generated monsters (e.g. a subclass).
+    """
+    global _monster_ids
+    if _monster_ids is None:
+        monsters = get_all_monsters()
+        _monster_ids = {monsters[i]: i for i in range(len(monsters))}
+    if monster_class not in _monster_ids:
+        raise ValueError(f"{monster_class.get_name()} is not a generated monster class.")
+    return _monster_ids[monster_class]
+
+def get_monster_by_id(monster_id: int) -> type[MonsterBase]:
+    """Inverse of get_monster_id."""
+    return get_all_monsters()[monster_id]
+
+MONSTER_ID_BITS = 8
+TEAM_SIZE_BITS = 3
+
+def pack_monster_ids(monster_ids: tuple[int, ...]) -> int:
+    """
+    Packs up to 7 monster ids into one int: the number of ids in the lowest TEAM_SIZE_BITS bits,
+    then MONSTER_ID_BITS bits per id. Complexity is O(n) for n ids.
+    """
+    code = len(monster_ids)
+    for i in range(len(monster_ids)):
+        code |= monster_ids[i] << (TEAM_SIZE_BITS + MONSTER_ID_BITS * i)
+    return code
+
+def unpack_monster_ids(code: int) -> tuple[int, ...]:
+    """Inverse of pack_monster_ids."""
+    mask = (1 << MONSTER_ID_BITS) - 1
+    return tuple(
+        (code >> (TEAM_SIZE_BITS + MONSTER_ID_BITS * i)) & mask
+        for i in range(code & ((1 << TEAM_SIZE_BITS) - 1))
+    )
+
 def _make_all_monster_classes():
     from stats import SimpleStats, ComplexStats
     global _monsters
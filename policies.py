@@ -0,0 +1,169 @@
+"""
+Pluggable action policies.
+
+A team given a policy (`MonsterTeam(..., policy=LookaheadPolicy())`, or by setting `team.policy`)
+has Battle ask the policy for its actions instead of calling MonsterTeam.choose_action.
+Unlike choose_action, a policy sees the whole battle, not only the two monsters that are out.
+
+LookaheadPolicy searches the turns ahead. Both teams act at the same time, so at every node the
+policy picks the action whose worst case, over the enemy's actions, is best (depth-limited
+minimax with alpha-beta style cut-offs). It deepens iteratively until max_depth or the time
+budget per decision runs out, and keeps a transposition table keyed by battle_state encodings.
+The search runs on one fork of the battle and moves between positions with Battle.snapshot and
+Battle.restore, so no team is rebuilt.
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from battle import Battle
+from battle_state import team_members
+from team import MonsterTeam
+
+
+class Policy:
+    """Chooses the action of one team. Subclasses implement choose_action."""
+
+    def choose_action(self, battle: Battle, side: int) -> Battle.Action:
+        """The action team `side` (1 or 2) takes on the current turn of battle."""
+        raise NotImplementedError
+
+
+class HeuristicPolicy(Policy):
+    """The default MonsterTeam.choose_action, as a policy."""
+
+    def choose_action(self, battle: Battle, side: int) -> Battle.Action:
+        if side == 1:
+            return MonsterTeam.choose_action(battle.team1, battle.out1, battle.out2)
+        return MonsterTeam.choose_action(battle.team2, battle.out2, battle.out1)
+
+
+class SearchTimeout(Exception):
+    """Raised inside LookaheadPolicy's search when the time budget of a decision runs out."""
+
+
+class LookaheadPolicy(Policy):
+    """
+    Depth-limited search over ATTACK, SWAP and SPECIAL, see the module docstring.
+
+    Attributes:
+        max_depth (int): deepest search, in turns
+        time_budget (float): seconds per decision, or None to always search to max_depth.
+            The deepest fully searched depth decides, depth 1 is always completed.
+        table (dict): transposition table, (battle state, side) -> (depth, value, action)
+        table_size (int): the table is cleared when it grows past this many entries
+        nodes, table_hits (int): search statistics since creation
+        last_depth (int): depth reached by the last decision
+    """
+
+    ACTIONS = (Battle.Action.ATTACK, Battle.Action.SWAP, Battle.Action.SPECIAL)
+    WIN = 1000.0
+    DEFAULT_MAX_DEPTH = 3
+    DEFAULT_TIME_BUDGET = 0.01
+    DEFAULT_TABLE_SIZE = 100_000
+
+    def __init__(
+        self,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+        table_size: int = DEFAULT_TABLE_SIZE,
+    ) -> None:
+        if max_depth <= 0:
+            raise ValueError("Search depth should be positive.")
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.table_size = table_size
+        self.table = {}
+        self.nodes = 0
+        self.table_hits = 0
+        self.last_depth = 0
+
+    def choose_action(self, battle: Battle, side: int) -> Battle.Action:
+        """
+        :complexity: O(9^d x c) for search depth d and c the cost of a turn plus a restore,
+            less with cut-offs and table hits.
+        """
+        self.winner = Battle.Result.TEAM1 if side == 1 else Battle.Result.TEAM2
+        self.loser = Battle.Result.TEAM2 if side == 1 else Battle.Result.TEAM1
+        self.deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        scratch = battle.fork()
+        # The scratch battle asks the teams nothing, so a policy on the enemy team is not searched.
+        scratch.team1.policy = None
+        scratch.team2.policy = None
+        root = scratch.snapshot()
+
+        best = self.ACTIONS[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                _, best = self.search(scratch, root, side, depth)
+            except SearchTimeout:
+                break
+            self.last_depth = depth
+        return best
+
+    def search(self, scratch: Battle, snapshot: tuple, side: int, depth: int) -> tuple[float, Battle.Action]:
+        """
+        The value for `side` of the position in snapshot, searched depth turns deep, and the action
+        achieving it. Leaves scratch in an unspecified position.
+        """
+        key = (snapshot[1], side)
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            self.table_hits += 1
+            return entry[1], entry[2]
+        self.nodes += 1
+        if self.deadline is not None and depth > 1 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        best_value, best_action = None, self.ACTIONS[0]
+        for action in self.ACTIONS:
+            # Worst case of this action over the enemy's replies.
+            worst = None
+            for reply in self.ACTIONS:
+                scratch.restore(snapshot)
+                if side == 1:
+                    result = scratch.apply_actions(action, reply)
+                else:
+                    result = scratch.apply_actions(reply, action)
+                if result is not None:
+                    value = self.result_value(result, depth)
+                elif depth == 1:
+                    value = self.evaluate(scratch, side)
+                else:
+                    value = self.search(scratch, scratch.snapshot(), side, depth - 1)[0]
+                if worst is None or value < worst:
+                    worst = value
+                # The enemy can already hold this action under the best one found.
+                if best_value is not None and worst <= best_value:
+                    break
+            if best_value is None or worst > best_value:
+                best_value, best_action = worst, action
+
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[key] = (depth, best_value, best_action)
+        return best_value, best_action
+
+    def result_value(self, result: Battle.Result, depth: int) -> float:
+        """Wins found with more depth left are closer, so they score higher (and such losses lower)."""
+        if result == self.winner:
+            return self.WIN + depth
+        if result == self.loser:
+            return -self.WIN - depth
+        return 0.0
+
+    @staticmethod
+    def material(team: MonsterTeam, out) -> float:
+        """1 plus the hp fraction of every monster still standing."""
+        value = 0.0
+        for monster in team_members(team) + [out]:
+            if monster.alive():
+                value += 1 + monster.get_hp() / monster.get_max_hp()
+        return value
+
+    def evaluate(self, battle: Battle, side: int) -> float:
+        """Static value of an unfinished battle for `side`."""
+        material1 = self.material(battle.team1, battle.out1)
+        material2 = self.material(battle.team2, battle.out2)
+        return material1 - material2 if side == 1 else material2 - material1
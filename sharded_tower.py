@@ -0,0 +1,158 @@
+"""
+A BattleTower whose battles are fought ahead of time on a process pool.
+
+A tower run is sequential: lives go up and down in battle order, and which enemy comes next
+depends on every earlier result. The battles themselves are not. No battle draws random numbers,
+and both teams are regenerated before every battle, so the result of my team against an enemy
+team is the same whenever, and however often, that enemy comes up.
+
+So at the first battle, the teams of the roster are sent, in roster order and as specs (see
+battle_pool), to a pool of worker processes that build the teams and battle them against my team.
+Only 2 x workers chunks are in flight at a time; more are sent as results are used.
+Each worker sends back the result and the state the battle ended in (battle_state.encode_battle).
+The main process keeps playing the tower as usual, taking each result as it arrives and only
+waiting when it gets ahead of the workers. It writes the end state into its own teams and battle,
+as a hit in the outcome cache does, so next_battle returns teams exactly as a serial run leaves
+them. Enemies that come round again reuse their result.
+
+The roster itself is generated in the main process by BattleTower.generate_teams, from the one
+RandomGen stream (drawing the random numbers of a team is cheap next to building and battling
+it). The LCG stream cannot be split into independent streams without changing the teams, so
+keeping it whole is what makes a sharded run identical to a serial one with the same seed:
+same results, same lives, same teams after every battle, same roster and the same RandomGen
+seed afterwards.
+
+The pool is only used when a battle has no side effects beyond its result, see uses_pool.
+Otherwise the tower battles in this process, exactly as BattleTower does.
+
+Usage:
+```
+with ShardedTower(workers=4) as tower:
+    tower.set_my_team(team)
+    tower.generate_teams(1000, lazy=True)
+    for result, my_team, enemy_team, my_lives, enemy_lives in tower:
+        ...
+```
+"""
+from __future__ import annotations
+
+from typing import Iterator, Optional
+
+from battle import Battle
+from battle_pool import battle_stream, make_pool
+from battle_state import decode_battle
+from helpers import unpack_monster_ids
+from team import MonsterTeam
+from tower import BattleTower
+from tower_checkpoint import roster_code
+
+DEFAULT_CHUNK_SIZE = 8
+
+
+class ShardedTower(BattleTower):
+    """
+    Attributes:
+        workers (int): worker processes. 1 or fewer battles each chunk in this process when it is needed.
+        chunk_size (int): enemy teams sent to a worker at a time
+        results (dict): packed monster ids of an enemy team -> (result, turn number, end state)
+            of its battle against my team
+    """
+
+    def __init__(self, battle: Optional[Battle] = None, workers: int = 2, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        BattleTower.__init__(self, battle)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.pool = None
+        self.results = None
+        self.pending = None
+
+    def set_my_team(self, team: MonsterTeam) -> None:
+        BattleTower.set_my_team(self, team)
+        self.close()
+
+    def generate_teams(self, n: int, lazy: bool = False) -> None:
+        BattleTower.generate_teams(self, n, lazy)
+        self.close()
+
+    def uses_pool(self) -> bool:
+        """
+        Whether results can come from the pool: the engine is a plain Battle (see Battle.is_plain) that
+        prints nothing, and my team can travel as a spec and be battled by simulate_fast.
+        """
+        if type(self.battle) is not Battle or not self.battle.is_plain() or self.battle.verbosity > 0:
+            return False
+        if not self.battle._fast_supported(self.my_team):
+            return False
+        try:
+            self.my_team.to_spec()
+        except ValueError:
+            return False
+        return True
+
+    def _start(self, enemy_entry: tuple) -> None:
+        """
+        Sends every distinct enemy team to be battled: the one just served from the roster,
+        then the rest of the roster in order.
+        """
+        my_spec = self.my_team.to_spec()
+        roster = self.enemy_teams
+        capacity = len(roster.array)
+        codes = [roster_code(enemy_entry)]
+        seen = {codes[0]}
+        for i in range(len(roster)):
+            code = roster_code(roster.array[(roster.front + i) % capacity])
+            if code not in seen:
+                seen.add(code)
+                codes.append(code)
+        self.pool = make_pool(self.workers) if self.workers > 1 else None
+        pairs = ((my_spec, (MonsterTeam.TeamMode.BACK.value, 0, unpack_monster_ids(code))) for code in codes)
+        self.results = {}
+        # Only a few chunks per worker are in flight, so end states are held for the results about
+        # to be used rather than for the whole roster, and stopping early leaves the rest unbattled.
+        stream = battle_stream(
+            pairs, chunk_size=self.chunk_size, pool=self.pool, final_states=True, lookahead=2 * self.workers
+        )
+        self.pending = zip(codes, stream)
+
+    def battle_result(self, enemy_entry: tuple, enemy_team: MonsterTeam) -> Battle.Result:
+        """
+        The result from the pool, waiting for it if the workers have not got there yet.
+        Both teams and the engine are left as the battle left them.
+        :complexity: O(Team_Size) once the result is in.
+        """
+        if self.results is None:
+            if not self.uses_pool():
+                return BattleTower.battle_result(self, enemy_entry, enemy_team)
+            self._start(enemy_entry)
+        code = roster_code(enemy_entry)
+        while code not in self.results:
+            done_code, entry = next(self.pending)
+            self.results[done_code] = entry
+        result, turn_number, end_state = self.results[code]
+        self.battle.team1 = self.my_team
+        self.battle.team2 = enemy_team
+        self.battle.turn_number = turn_number
+        self.battle.stalled = False
+        decode_battle(self.battle, end_state)
+        return result
+
+    def close(self) -> None:
+        """Shuts the pool down and forgets the results, which belong to the current team and roster."""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        self.pool = None
+        self.results = None
+        self.pending = None
+
+    def __enter__(self) -> ShardedTower:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        self.close_log()
+
+    def __iter__(self) -> Iterator[tuple[Battle.Result, MonsterTeam, MonsterTeam, int, int]]:
+        try:
+            yield from BattleTower.__iter__(self)
+        finally:
+            self.close()
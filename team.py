@@ -5,13 +5,15 @@ from typing import Optional, TYPE_CHECKING
 from base_enum import BaseEnum
 from monster_base import MonsterBase
 from random_gen import RandomGen
-from helpers import get_all_monsters
+from helpers import get_all_monsters, get_monster_id, get_monster_by_id
+from elements import Element
 
 from data_structures.referential_array import ArrayR
 from data_structures.stack_adt import *
 from data_structures.queue_adt import *
 from data_structures.array_sorted_list import *
 from data_structures.sorted_list_adt import *
+from data_structures.bset import BSet
 
 if TYPE_CHECKING:
     from battle import Battle
@@ -42,6 +44,8 @@ class MonsterTeam:
 
     def __init__(self, team_mode: TeamMode, selection_mode, **kwargs) -> None:
         self.team_mode = team_mode
+        # Optional policies.Policy, which Battle asks for actions instead of choose_action.
+        self.policy = kwargs.get("policy")
         if self.team_mode == self.TeamMode.FRONT:
             self.team = ArrayStack(self.TEAM_LIMIT)
         elif self.team_mode == self.TeamMode.BACK:
@@ -55,6 +59,7 @@ class MonsterTeam:
 
         self.original_team = CircularQueue(self.TEAM_LIMIT)
         self.team_creation_is_completed = False
+        self.element_bits = None
 
         if selection_mode == self.SelectionMode.RANDOM:
             self.select_randomly()
@@ -218,13 +223,19 @@ class MonsterTeam:
             self.original_team.append(monster)
 
     def select_randomly(self):
-        team_size = RandomGen.randint(1, self.TEAM_LIMIT)
+        for monster_id in self.random_monster_ids():
+            self.add_to_team(get_monster_by_id(monster_id)())
+
+    @classmethod
+    def random_monster_ids(cls) -> tuple[int, ...]:
+        team_size = RandomGen.randint(1, cls.TEAM_LIMIT)
         monsters = get_all_monsters()
         n_spawnable = 0
         for x in range(len(monsters)):
             if monsters[x].can_be_spawned():
                 n_spawnable += 1
 
+        monster_ids = []
         for _ in range(team_size):
             spawner_index = RandomGen.randint(0, n_spawnable-1)
             cur_index = -1
@@ -233,10 +244,18 @@ class MonsterTeam:
                     cur_index += 1
                     if cur_index == spawner_index:
                         # Spawn this monster
-                        self.add_to_team(monsters[x]())
+                        monster_ids.append(x)
                         break
             else:
                 raise ValueError("Spawning logic failed.")
+        return tuple(monster_ids)
+        """
+        Picks the monsters of a random team, as monster ids (see helpers.get_monster_id), without creating them.
+        It draws exactly the random numbers select_randomly always did, so a team picked here and a
+        team selected randomly from the same seed are the same team.
+        Complexity is O(TEAM_LIMIT x Monsters) for the spawn index search.
+        """
+
     """
     Complexity Analysis and Explaination FOR reg_team...
     reg_team is when we empty the team and refill with new instances of the inital monsters
@@ -445,6 +464,51 @@ class MonsterTeam:
         for monster in provided_monsters:
             self.add_to_team(monster())
 
+    def element_set(self) -> BSet:
+        if self.element_bits is None:
+            self.element_bits = BSet()
+            for _ in range(len(self.original_team)):
+                monster = self.original_team.serve()
+                self.element_bits.add(Element.from_string(monster.get_element()).value)
+                self.original_team.append(monster)
+        return self.element_bits
+        """
+        The elements of the team as it was selected, as a BSet of Element values.
+        It is computed from the original team the first time it is asked for and cached afterwards,
+        as the original team never changes once the team is created.
+        First call is O(n x from_string) where n is the size of the original team, later calls are O(1).
+        """
+
+    def to_spec(self) -> tuple[int, int, tuple[int, ...]]:
+        """
+        Compact description of the team as it was selected: (team mode, sort key, monster ids).
+        The sort key is 0 outside OPTIMISE mode and monster ids come from helpers.get_monster_id.
+        from_spec rebuilds the team in its regenerated state.
+
+        Complexity is O(n) where n is the size of the original team.
+        """
+        monster_ids = []
+        for _ in range(len(self.original_team)):
+            monster = self.original_team.serve()
+            monster_ids.append(get_monster_id(monster))
+            self.original_team.append(monster)
+        sort_key = self.sort_key.value if self.team_mode == self.TeamMode.OPTIMISE else 0
+        return (self.team_mode.value, sort_key, tuple(monster_ids))
+
+    @classmethod
+    def from_spec(cls, spec: tuple[int, int, tuple[int, ...]]) -> MonsterTeam:
+        """Builds a fresh team from a spec produced by to_spec."""
+        team_mode, sort_key, monster_ids = spec
+        provided = ArrayR(len(monster_ids))
+        for i in range(len(monster_ids)):
+            provided[i] = get_monster_by_id(monster_ids[i])
+        return MonsterTeam(
+            team_mode=cls.TeamMode(team_mode),
+            selection_mode=cls.SelectionMode.PROVIDED,
+            sort_key=cls.SortMode(sort_key) if sort_key else None,
+            provided_monsters=provided,
+        )
+
     def choose_action(self, currently_out: MonsterBase, enemy: MonsterBase) -> Battle.Action:
         # This is just a placeholder function that doesn't matter much for testing.
         from battle import Battle
@@ -0,0 +1,70 @@
+from unittest import TestCase, skipIf
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+from random_gen import RandomGen
+
+from battle import Battle
+from team import MonsterTeam
+from helpers import Aquariuma, Flamikin, Vineon, Strikeon
+
+from data_structures.referential_array import ArrayR
+
+try:
+    import numpy
+    from batch_battle import BatchBattle
+except ImportError:
+    numpy = None
+
+def random_back_teams(n, seed):
+    RandomGen.set_seed(seed)
+    return [
+        MonsterTeam(MonsterTeam.TeamMode.BACK, MonsterTeam.SelectionMode.RANDOM)
+        for _ in range(n)
+    ]
+
+@skipIf(numpy is None, "numpy is not installed")
+class TestBatchBattle(TestCase):
+
+    @number("4.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_batch_matches_battle(self):
+        n = 500
+        results = BatchBattle().battle_teams(random_back_teams(n, 11), random_back_teams(n, 12))
+        expected = []
+        for team1, team2 in zip(random_back_teams(n, 11), random_back_teams(n, 12)):
+            expected.append(Battle(verbosity=0).battle(team1, team2).value)
+        self.assertListEqual(results.tolist(), expected)
+
+    @number("4.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_batch_rejects_other_modes(self):
+        team = MonsterTeam(
+            team_mode=MonsterTeam.TeamMode.FRONT,
+            selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+            provided_monsters=ArrayR.from_list([Flamikin, Aquariuma, Vineon, Strikeon])
+        )
+        self.assertRaises(ValueError, lambda: BatchBattle().pack([team]))
+
+    @number("4.31")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_batch_rejects_custom_teams(self):
+        def back_team(team_class=MonsterTeam):
+            return team_class(
+                team_mode=MonsterTeam.TeamMode.BACK,
+                selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+                provided_monsters=ArrayR.from_list([Flamikin, Aquariuma])
+            )
+
+        BatchBattle().pack([back_team()])
+        # Teams that would not play the default choose_action in battle() can't be batched.
+        overridden = back_team()
+        overridden.choose_action = lambda currently_out, enemy: Battle.Action.SWAP
+        class SwappingTeam(MonsterTeam):
+            def choose_action(self, currently_out, enemy):
+                return Battle.Action.SWAP
+        for team in (overridden, back_team(SwappingTeam)):
+            self.assertRaises(ValueError, lambda: BatchBattle().pack([back_team(), team]))
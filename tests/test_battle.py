@@ -2,13 +2,23 @@ from unittest import TestCase
 
 from ed_utils.decorators import number, visibility
 from ed_utils.timeout import timeout
+from random_gen import RandomGen
 
 from battle import Battle
+from battle_cache import OutcomeCache
+from battle_events import EventRecorder
+from battle_state import team_members
 from team import MonsterTeam
-from helpers import Flamikin, Aquariuma, Vineon, Strikeon, Normake, Marititan, Leviatitan, Treetower, Infernoth
+from helpers import Flamikin, Aquariuma, Vineon, Strikeon, Normake, Marititan, Leviatitan, Treetower, Infernoth, Frostbite, Metalhorn
 
 from data_structures.referential_array import ArrayR
 
+class UndyingFlamikin(Flamikin):
+
+    def set_hp(self, val):
+        # Never takes damage, so a battle against it can only stall.
+        pass
+
 class BattleMock(Battle):
 
     def __init__(self, verbosity=0) -> None:
@@ -38,6 +48,25 @@ class BattleMock(Battle):
             self.cur_index += 1
         return super().process_turn()
 
+def random_teams(seed):
+    """Two random teams with seeded team modes, so the same seed always rebuilds the same pair."""
+    modes = [(MonsterTeam.TeamMode.FRONT, None), (MonsterTeam.TeamMode.BACK, None)]
+    for sort_key in MonsterTeam.SortMode:
+        modes.append((MonsterTeam.TeamMode.OPTIMISE, sort_key))
+    RandomGen.set_seed(seed)
+    teams = []
+    for _ in range(2):
+        team_mode, sort_key = modes[RandomGen.randint(0, len(modes) - 1)]
+        teams.append(MonsterTeam(team_mode, MonsterTeam.SelectionMode.RANDOM, sort_key=sort_key))
+    return teams
+
+def battle_state(b):
+    """Everything a finished battle leaves behind, as strings."""
+    state = [str(b.out1), str(b.out2)]
+    for team in (b.team1, b.team2):
+        state.append([str(monster) for monster in team_members(team)])
+    return state
+
 class TestBattle(TestCase):
 
     @number("4.1")
@@ -133,3 +162,231 @@ class TestBattle(TestCase):
         ]
         res = b.battle(team1, team2)
         self.assertEqual(res, Battle.Result.DRAW)
+
+    @number("4.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_simulate_fast_matches_battle(self):
+        for seed in range(300):
+            b = Battle(verbosity=0)
+            res = b.battle(*random_teams(seed))
+            fast = Battle(verbosity=0)
+            fast_res = fast.simulate_fast(*random_teams(seed))
+            self.assertEqual(fast_res, res, f"Seed {seed}")
+            self.assertListEqual(battle_state(fast), battle_state(b), f"Seed {seed}")
+
+    @number("4.33")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_simulate_fast_honours_engine_options(self):
+        # Stall guards, events and the cache are only handled by battle(), so simulate_fast defers to it.
+        def engine(options):
+            options = dict(options)
+            if options.pop("events", False):
+                options["events"] = EventRecorder()
+            if options.pop("cache", False):
+                options["cache"] = OutcomeCache()
+            return Battle(verbosity=0, **options)
+
+        for options in ({"max_turns": 2}, {"detect_cycles": True}, {"events": True}, {"cache": True}):
+            b = engine(options)
+            fast = engine(options)
+            for seed in range(20):
+                # Twice per seed, so the cache answers the second battle.
+                for _ in range(2):
+                    res = b.battle(*random_teams(seed))
+                    self.assertEqual(fast.simulate_fast(*random_teams(seed)), res, f"{options} seed {seed}")
+                    self.assertEqual(fast.stalled, b.stalled)
+                    self.assertEqual(fast.turn_number, b.turn_number)
+                    self.assertListEqual(battle_state(fast), battle_state(b))
+            if b.events is not None:
+                self.assertListEqual(fast.events.records(), b.events.records())
+            if b.cache is not None:
+                self.assertEqual(fast.cache.stats(), b.cache.stats())
+                self.assertGreater(fast.cache.hits, 0)
+        # After a stalled battle, a plain engine's fast path clears the flag.
+        b = Battle(verbosity=0, max_turns=2)
+        b.simulate_fast(*random_teams(3))
+        self.assertTrue(b.stalled)
+        b.max_turns = None
+        b.simulate_fast(*random_teams(3))
+        self.assertFalse(b.stalled)
+
+    @number("4.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_simulate_fast_custom_policy(self):
+        # A custom choose_action falls back to the full engine.
+        b = BattleMock(verbosity=0)
+        b.test_class = self
+        team1 = MonsterTeam(
+            team_mode=MonsterTeam.TeamMode.BACK,
+            selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+            provided_monsters=ArrayR.from_list([Aquariuma, Aquariuma])
+        )
+        team2 = MonsterTeam(
+            team_mode=MonsterTeam.TeamMode.FRONT,
+            selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+            provided_monsters=ArrayR.from_list([Aquariuma, Aquariuma])
+        )
+        team1.choose_action = lambda out, team: Battle.Action.ATTACK
+        team2.choose_action = lambda out, team: Battle.Action.ATTACK
+        b.expected_battle_log = [
+            (Aquariuma, Aquariuma, "LV.1 Aquariuma, 8/8 HP", "LV.1 Aquariuma, 8/8 HP"),
+            (Aquariuma, Aquariuma, "LV.1 Aquariuma, 6/8 HP", "LV.1 Aquariuma, 6/8 HP"),
+        ]
+        self.assertEqual(b.simulate_fast(team1, team2), Battle.Result.DRAW)
+        self.assertEqual(b.cur_index, 2)
+
+    @number("4.10")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_simulate_fast_skips_attack_exchanges(self):
+        def tanky_teams():
+            teams = []
+            for monster_class in (Frostbite, Metalhorn):
+                team = MonsterTeam(
+                    team_mode=MonsterTeam.TeamMode.BACK,
+                    selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+                    provided_monsters=ArrayR.from_list([monster_class, Flamikin])
+                )
+                for monster in team_members(team):
+                    monster.set_hp(3000)
+                teams.append(team)
+            return teams
+
+        b = Battle(verbosity=0)
+        res = b.battle(*tanky_teams())
+        fast = Battle(verbosity=0)
+        self.assertEqual(fast.simulate_fast(*tanky_teams()), res)
+        self.assertListEqual(battle_state(fast), battle_state(b))
+        self.assertGreater(fast.fast_forwarded_turns, 1000)
+
+    def undying_teams(self, action):
+        teams = []
+        for team_mode in (MonsterTeam.TeamMode.BACK, MonsterTeam.TeamMode.BACK):
+            team = MonsterTeam(
+                team_mode=team_mode,
+                selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+                provided_monsters=ArrayR.from_list([UndyingFlamikin, UndyingFlamikin, UndyingFlamikin])
+            )
+            team.choose_action = lambda out, enemy: action
+            teams.append(team)
+        return teams
+
+    @number("4.14")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_cycle_detection(self):
+        b = Battle(verbosity=0, detect_cycles=True)
+        # Swapping identical monsters forever comes straight back to the same state.
+        self.assertEqual(b.battle(*self.undying_teams(Battle.Action.SWAP)), Battle.Result.DRAW)
+        self.assertTrue(b.stalled)
+        self.assertEqual(b.turn_number, 1)
+        self.assertEqual(b.battle(*self.undying_teams(Battle.Action.ATTACK)), Battle.Result.DRAW)
+        self.assertEqual(b.stall_count, 2)
+        # A normal battle does not stall.
+        self.assertEqual(b.battle(*random_teams(5)), Battle(verbosity=0).battle(*random_teams(5)))
+        self.assertFalse(b.stalled)
+        self.assertEqual(b.stall_count, 2)
+
+    @number("4.15")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_turn_budget(self):
+        b = Battle(verbosity=0, max_turns=50)
+        self.assertEqual(b.battle(*self.undying_teams(Battle.Action.ATTACK)), Battle.Result.DRAW)
+        self.assertTrue(b.stalled)
+        self.assertEqual(b.turn_number, 50)
+        self.assertEqual(b.stall_count, 1)
+
+    def start_battle(self, seed, turns):
+        """A battle between random_teams(seed), played up to the start of turn `turns` (or its end)."""
+        b = Battle(verbosity=0)
+        b.team1, b.team2 = random_teams(seed)
+        b.out1 = b.team1.retrieve_from_team()
+        b.out2 = b.team2.retrieve_from_team()
+        b.turn_number = 0
+        result = None
+        while result is None and b.turn_number < turns:
+            result = b.process_turn()
+            b.turn_number += 1
+        return b, result
+
+    def play_out(self, b):
+        result = None
+        while result is None:
+            result = b.process_turn()
+            b.turn_number += 1
+        return result
+
+    @number("4.21")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_snapshot_restore(self):
+        for seed in range(100):
+            b, result = self.start_battle(seed, 2)
+            if result is not None:
+                continue
+            snapshot = b.snapshot()
+            result = self.play_out(b)
+            final_snapshot = b.snapshot()
+            b.restore(snapshot)
+            self.assertEqual(b.snapshot(), snapshot)
+            self.assertEqual(self.play_out(b), result)
+            self.assertEqual(b.snapshot(), final_snapshot)
+
+    @number("4.22")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_fork(self):
+        for seed in range(100):
+            b, result = self.start_battle(seed, 2)
+            if result is not None:
+                continue
+            snapshot = b.snapshot()
+            fork = b.fork()
+            self.assertEqual(fork.snapshot(), snapshot)
+            # Playing the fork out, with other actions on its first turn, leaves the battle untouched.
+            fork.apply_actions(Battle.Action.SWAP, Battle.Action.SPECIAL)
+            fork.turn_number += 1
+            self.play_out(fork)
+            self.assertEqual(b.snapshot(), snapshot)
+            result = self.play_out(b)
+            # A fork taken now plays out the same way as the battle did.
+            b.restore(snapshot)
+            self.assertEqual(self.play_out(b.fork()), result)
+
+    @number("4.28")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_battle_many(self):
+        def round_robin():
+            # Every team fights every other team twice, as team 1 and as team 2.
+            teams = [random_teams(seed)[0] for seed in range(8)]
+            return [(teams[i], teams[j]) for i in range(8) for j in range(8) if i != j]
+
+        expected = []
+        for i in range(8):
+            for j in range(8):
+                if i != j:
+                    expected.append(Battle(verbosity=0).battle(random_teams(i)[0], random_teams(j)[0]))
+        results = Battle(verbosity=0).battle_many(round_robin())
+        self.assertNotIsInstance(results, list)
+        self.assertListEqual(list(results), expected)
+        # The stall guards route battles through battle(), with the same results.
+        self.assertListEqual(list(Battle(verbosity=0, max_turns=10000).battle_many(round_robin())), expected)
+
+    @number("4.29")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_battle_many_is_lazy(self):
+        def endless_pairs():
+            seed = 0
+            while True:
+                yield random_teams(seed)
+                seed += 1
+
+        results = Battle(verbosity=0).battle_many(endless_pairs())
+        for seed in range(50):
+            self.assertEqual(next(results), Battle(verbosity=0).battle(*random_teams(seed)))
@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+from random_gen import RandomGen
+
+from battle import Battle
+from battle_cache import OutcomeCache
+from battle_state import encode_battle
+from team import MonsterTeam
+from tower import BattleTower
+
+class TestOutcomeCache(TestCase):
+
+    def run_tower(self, battle):
+        RandomGen.set_seed(1008)
+        bt = BattleTower(battle)
+        bt.set_my_team(MonsterTeam(MonsterTeam.TeamMode.BACK, MonsterTeam.SelectionMode.RANDOM))
+        bt.generate_teams(4)
+        got = []
+        while bt.battles_remaining():
+            result, team1, team2, lives1, lives2 = bt.next_battle()
+            got.append((result, lives1, lives2, encode_battle(battle)))
+        return got
+
+    @number("4.11")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_tower_with_cache(self):
+        cache = OutcomeCache(maxsize=16)
+        self.assertListEqual(self.run_tower(Battle(cache=cache)), self.run_tower(Battle()))
+        # Every enemy team is fought again after its first battle.
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(cache.stats()["hit_rate"], cache.hits / (cache.hits + 4))
+
+    @number("4.12")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_per_turn_cache(self):
+        cache = OutcomeCache(maxsize=1000, per_turn=True)
+        self.assertListEqual(self.run_tower(Battle(cache=cache)), self.run_tower(Battle()))
+        self.assertGreater(len(cache), 4)
+
+    @number("4.13")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_eviction(self):
+        cache = OutcomeCache(maxsize=2)
+        cache.put(1, Battle.Result.TEAM1, ())
+        cache.put(2, Battle.Result.TEAM2, ())
+        self.assertIsNotNone(cache.get(1))
+        cache.put(3, Battle.Result.DRAW, ())
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(1))
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.stats()["hits"], 2)
@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from battle import Battle
+from battle_events import EventRecorder, EventType, JsonlSink, BinarySink, read_binary, RECORD_WIDTH
+from helpers import get_monster_id, Flamikin, Aquariuma, Vineon, Strikeon, Infernoth
+from team import MonsterTeam
+
+from data_structures.referential_array import ArrayR
+
+def simple_battle_teams():
+    """The teams of test_battle.test_simple_battle, where every monster always attacks."""
+    team1 = MonsterTeam(
+        team_mode=MonsterTeam.TeamMode.BACK,
+        selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+        provided_monsters=ArrayR.from_list([Flamikin, Aquariuma, Vineon, Strikeon])
+    )
+    team2 = MonsterTeam(
+        team_mode=MonsterTeam.TeamMode.FRONT,
+        selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+        provided_monsters=ArrayR.from_list([Flamikin, Aquariuma, Vineon, Strikeon])
+    )
+    team1.choose_action = lambda out, team: Battle.Action.ATTACK
+    team2.choose_action = lambda out, team: Battle.Action.ATTACK
+    return team1, team2
+
+class TestBattleEvents(TestCase):
+
+    @number("4.16")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_recorded_events(self):
+        recorder = EventRecorder()
+        b = Battle(verbosity=0, events=recorder)
+        self.assertEqual(b.battle(*simple_battle_teams()), Battle.Result.TEAM1)
+        records = recorder.records()
+        self.assertEqual(records[0], (EventType.RETRIEVE.value, 0, 1, get_monster_id(Flamikin), 6))
+        self.assertEqual(records[1], (EventType.RETRIEVE.value, 0, 2, get_monster_id(Strikeon), 5))
+        self.assertEqual(records[-1], (EventType.RESULT.value, 15, 0, Battle.Result.TEAM1.value, 15))
+        turns = [record for record in records if record[0] == EventType.TURN_START.value]
+        self.assertEqual(len(turns), 15)
+        # Turn 1: Strikeon (speed 7) is faster than Flamikin (speed 2), so team 2 attacks first,
+        # and Flamikin survives to attack back.
+        attacks = [record[2:] for record in records if record[0] == EventType.ATTACK.value and record[1] == 0]
+        self.assertListEqual(attacks, [(2, 4, 2), (1, 1, 4)])
+        evolutions = [record[3:] for record in records if record[0] == EventType.EVOLVE.value]
+        self.assertEqual(evolutions[-1], (get_monster_id(Flamikin), get_monster_id(Infernoth)))
+
+    @number("4.17")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_ring_buffer_wraps(self):
+        recorder = EventRecorder(capacity=4)
+        for i in range(10):
+            recorder.emit(EventType.TURN_START.value, i, 0, 0, 0)
+        self.assertEqual(recorder.total, 10)
+        self.assertListEqual([record[1] for record in recorder.records()], [6, 7, 8, 9])
+
+    @number("4.18")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_sinks(self):
+        text = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.bin")
+            with JsonlSink(text) as jsonl, BinarySink(path) as binary:
+                recorder = EventRecorder(capacity=8, sinks=[jsonl, binary])
+                Battle(verbosity=0, events=recorder).battle(*simple_battle_teams())
+                in_buffer = recorder.records()
+                recorder.flush()
+            saved = read_binary(path)
+        self.assertEqual(len(saved), recorder.total)
+        self.assertListEqual(saved[-len(in_buffer):], in_buffer)
+        lines = text.getvalue().splitlines()
+        self.assertEqual(len(lines), recorder.total)
+        self.assertEqual(json.loads(lines[-1]), {"type": "RESULT", "turn": 15, "team": 0, "a": 1, "b": 15})
+        self.assertEqual(len(saved[0]), RECORD_WIDTH)
@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+from random_gen import RandomGen
+
+from battle import Battle
+from battle_pool import battle_many, battle_stream, make_pool
+from team import MonsterTeam
+
+def random_specs(n, seed):
+    RandomGen.set_seed(seed)
+    specs = []
+    for _ in range(n):
+        team1 = MonsterTeam(MonsterTeam.TeamMode.BACK, MonsterTeam.SelectionMode.RANDOM)
+        team2 = MonsterTeam(
+            MonsterTeam.TeamMode.OPTIMISE,
+            MonsterTeam.SelectionMode.RANDOM,
+            sort_key=MonsterTeam.SortMode.HP,
+        )
+        specs.append((team1.to_spec(), team2.to_spec()))
+    return specs
+
+class TestBattlePool(TestCase):
+
+    @number("4.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(10)
+    def test_worker_count_does_not_change_results(self):
+        specs = random_specs(200, 2085)
+        expected = []
+        for spec1, spec2 in specs:
+            expected.append(Battle(verbosity=0).battle(MonsterTeam.from_spec(spec1), MonsterTeam.from_spec(spec2)))
+        self.assertListEqual(battle_many(specs, workers=1), expected)
+        self.assertListEqual(battle_many(specs, workers=2, chunk_size=7), expected)
+
+    @number("4.9")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_teams_and_specs_mix(self):
+        specs = random_specs(3, 1054)
+        pairs = [(MonsterTeam.from_spec(spec1), spec2) for spec1, spec2 in specs]
+        self.assertListEqual(battle_many(pairs), battle_many(specs))
+
+    @number("4.35")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(10)
+    def test_stream_lookahead(self):
+        specs = random_specs(100, 1008)
+        pulled = []
+
+        def counted():
+            for pair in specs:
+                pulled.append(pair)
+                yield pair
+
+        with make_pool(2) as pool:
+            stream = battle_stream(counted(), chunk_size=5, pool=pool, lookahead=4)
+            first = next(stream)
+            # Only the chunks in flight have been taken from the input.
+            self.assertLessEqual(len(pulled), 4 * 5)
+            self.assertListEqual([first] + list(stream), battle_many(specs))
+        self.assertEqual(len(pulled), len(specs))
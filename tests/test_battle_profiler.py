@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from battle import Battle
+from battle_events import EventRecorder, EventType
+from battle_profiler import PhaseProfiler
+from policies import LookaheadPolicy
+from tests.test_battle import random_teams
+from tests.test_battle_events import simple_battle_teams
+
+class TestBattleProfiler(TestCase):
+
+    @number("4.26")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_phase_counts(self):
+        profiler = PhaseProfiler()
+        recorder = EventRecorder()
+        b = profiler.attach(Battle(verbosity=0, events=recorder))
+        self.assertEqual(b.battle(*simple_battle_teams()), Battle.Result.TEAM1)
+        counts = {}
+        for record in recorder.records():
+            counts[record[0]] = counts.get(record[0], 0) + 1
+
+        stats = profiler.last_battle
+        self.assertEqual(stats["choose_action"]["calls"], 2 * b.turn_number)
+        self.assertEqual(stats["swap"]["calls"], 2 * b.turn_number)
+        self.assertEqual(stats["tick"]["calls"], b.turn_number)
+        self.assertEqual(stats["attack"]["calls"], counts[EventType.ATTACK.value])
+        self.assertEqual(stats["retrieve"]["calls"], counts[EventType.RETRIEVE.value])
+        self.assertEqual(stats["level_up"]["calls"], counts[EventType.LEVEL_UP.value])
+        self.assertEqual(stats["evolve"]["calls"], counts[EventType.EVOLVE.value])
+        self.assertEqual(stats["faint"]["calls"], counts[EventType.LEVEL_UP.value] + 1)
+        for phase in PhaseProfiler.PHASES:
+            self.assertGreaterEqual(stats[phase]["seconds"], 0)
+
+        # Run totals add up over battles.
+        b.battle(*simple_battle_teams())
+        self.assertEqual(profiler.battles, 2)
+        self.assertEqual(profiler.turns, 2 * b.turn_number)
+        self.assertEqual(profiler.stats()["attack"]["calls"], 2 * stats["attack"]["calls"])
+
+    @number("4.27")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_detach(self):
+        profiler = PhaseProfiler()
+        b = profiler.attach(Battle(verbosity=0))
+        for seed in range(20):
+            self.assertEqual(b.battle(*random_teams(seed)), Battle(verbosity=0).battle(*random_teams(seed)))
+        profiler.detach(b)
+        for method in list(PhaseProfiler.PHASES.values()) + ["battle"]:
+            self.assertNotIn(method, vars(b))
+        b.battle(*random_teams(0))
+        self.assertEqual(profiler.battles, 20)
+
+    @number("4.30")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(20)
+    def test_profiled_lookahead(self):
+        # Lookahead searches on forks of the battle, which must not touch the profiled battle.
+        policy = LookaheadPolicy(max_depth=2, time_budget=None)
+        profiler = PhaseProfiler()
+        for seed in range(20):
+            team1, team2 = random_teams(seed)
+            team1.policy = policy
+            expected = Battle(verbosity=0, max_turns=500).battle(team1, team2)
+            team1, team2 = random_teams(seed)
+            team1.policy = policy
+            b = profiler.attach(Battle(verbosity=0, max_turns=500))
+            self.assertEqual(b.battle(team1, team2), expected)
+            self.assertIsNone(b.fork().profiler)
+            self.assertIs(b.profiler, profiler)
+        self.assertEqual(profiler.battles, 20)
+
+    @number("4.34")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_reset_while_attached(self):
+        profiler = PhaseProfiler()
+        b = profiler.attach(Battle(verbosity=0))
+        b.battle(*simple_battle_teams())
+        expected = profiler.last_battle["attack"]["calls"]
+        profiler.reset()
+        self.assertEqual(profiler.battles, 0)
+        self.assertEqual(profiler.stats()["attack"]["calls"], 0)
+        # The attached wrappers keep counting after the reset.
+        b.battle(*simple_battle_teams())
+        self.assertEqual(profiler.battles, 1)
+        self.assertEqual(profiler.last_battle["attack"]["calls"], expected)
+        self.assertEqual(profiler.stats()["attack"]["calls"], expected)
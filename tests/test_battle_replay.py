@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from battle import Battle
+from battle_replay import BattleRecorder, BattleReplayer
+from battle_state import encode_battle
+from tests.test_battle import random_teams
+
+class TestBattleReplay(TestCase):
+
+    @number("4.19")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_replay_matches(self):
+        recorder = BattleRecorder(checkpoint_every=4, keep=None)
+        b = Battle(verbosity=0, recorder=recorder)
+        for seed in range(100):
+            result = b.battle(*random_teams(seed))
+            final_state = encode_battle(b)
+            recording = recorder.last()
+            self.assertEqual(recording.result, result)
+            self.assertEqual(BattleReplayer(recording).replay(), result)
+            # Replaying the last turn ends in the recorded final state.
+            replay = BattleReplayer(recording).seek(recording.turns - 1)
+            self.assertEqual(replay.process_turn(), result)
+            self.assertEqual(encode_battle(replay), final_state)
+        self.assertEqual(len(recorder.recordings), 100)
+
+    @number("4.20")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_seek(self):
+        # Checkpointing every turn records every state the battle went through.
+        every_turn = BattleRecorder(checkpoint_every=1)
+        sparse = BattleRecorder(checkpoint_every=8)
+        for seed in range(100):
+            Battle(verbosity=0, recorder=every_turn).battle(*random_teams(seed))
+            Battle(verbosity=0, recorder=sparse).battle(*random_teams(seed))
+            expected = every_turn.last()
+            replayer = BattleReplayer(sparse.last())
+            self.assertEqual(sparse.last().actions, expected.actions)
+            for turn in range(expected.turns):
+                self.assertEqual(encode_battle(replayer.seek(turn)), expected.checkpoints[turn][1])
+
+    @number("4.32")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_keep(self):
+        bounded = BattleRecorder()
+        unbounded = BattleRecorder(keep=None)
+        for seed in range(BattleRecorder.DEFAULT_KEEP + 4):
+            Battle(verbosity=0, recorder=bounded).battle(*random_teams(seed))
+            Battle(verbosity=0, recorder=unbounded).battle(*random_teams(seed))
+        # Only the most recent recordings are kept by default.
+        self.assertEqual(len(bounded.recordings), BattleRecorder.DEFAULT_KEEP)
+        self.assertEqual(len(unbounded.recordings), BattleRecorder.DEFAULT_KEEP + 4)
+        self.assertEqual(bounded.recordings[0].actions, unbounded.recordings[4].actions)
+        self.assertEqual(bounded.last().actions, unbounded.last().actions)
+        with self.assertRaises(ValueError):
+            BattleRecorder(keep=0)
@@ -0,0 +1,149 @@
+from unittest import TestCase, skipIf
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from data_structures.array_sorted_list import ArraySortedList
+from data_structures.bucket_sort import bucket_sort
+from data_structures.referential_array import ArrayR, ArrayInt, ArrayFloat
+from data_structures.sorted_list_adt import ListItem
+from elements import EffectivenessCalculator, Element
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class TestDataStructures(TestCase):
+
+    @number("6.1")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_bucket_sort(self):
+        items = ArrayR.from_list([(5, "a"), (3, "b"), (2, "c"), (9, "d"), (6, "e"), (2, "f"), (3, "g")])
+        result = bucket_sort(items, lambda item: item[0], 2, 10)
+        # Equal keys keep their input order.
+        self.assertListEqual(result.to_list(), [(2, "c"), (2, "f"), (3, "b"), (3, "g"), (5, "a"), (6, "e"), (9, "d")])
+        # The input is left as it was.
+        self.assertEqual(items[0], (5, "a"))
+        self.assertListEqual(bucket_sort(ArrayR(0), lambda item: item, 0, 1).to_list(), [])
+        with self.assertRaises(ValueError):
+            bucket_sort(items, lambda item: item[0], 2, 8)
+
+    @number("6.2")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_array_bulk_operations(self):
+        array = ArrayR(6)
+        self.assertListEqual(list(array), [None] * 6)
+        array.fill(7)
+        array.fill(0, 4)
+        self.assertListEqual(array.to_list(), [7, 7, 7, 7, 0, 0])
+        array[1:3] = ["a", "b"]
+        self.assertListEqual(array[0:4], [7, "a", "b", 7])
+
+        # Overlapping copies within one array behave like memmove, in both directions.
+        array = ArrayR.from_list(range(8))
+        array.copy_range(array, 0, 2, 5)
+        self.assertListEqual(array.to_list(), [0, 1, 0, 1, 2, 3, 4, 7])
+        array.copy_range(array, 2, 0, 5)
+        self.assertListEqual(array.to_list(), [0, 1, 2, 3, 4, 3, 4, 7])
+        other = ArrayR(3)
+        other.copy_range(array, 5, 0, 3)
+        self.assertListEqual(other.to_list(), [3, 4, 7])
+        for bad in ((array, 6, 0, 3), (array, 0, 1, 3), (array, -1, 0, 1)):
+            with self.assertRaises(IndexError):
+                other.copy_range(*bad)
+        with self.assertRaises(IndexError):
+            other.fill(0, 2, 4)
+
+        # Sorted list shifts and resizes go through copy_range.
+        sorted_list = ArraySortedList(1)
+        for key in [5, 1, 4, 2, 3, 0]:
+            sorted_list.add(ListItem(str(key), key))
+        sorted_list.delete_at_index(2)
+        sorted_list.delete_at_index(0)
+        self.assertListEqual([sorted_list[i].key for i in range(len(sorted_list))], [1, 3, 4, 5])
+
+    @number("6.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_typed_arrays(self):
+        ints = ArrayInt(5)
+        self.assertListEqual(list(ints), [0] * 5)
+        ints[1] = 3
+        ints[2:4] = [7, 8]
+        self.assertListEqual(ints.to_list(), [0, 3, 7, 8, 0])
+        # A slice is a list, as for ArrayR.
+        self.assertEqual(ints[0:2], [0, 3])
+        self.assertIsInstance(ints[1:], list)
+        # The length is fixed, as for ArrayR.
+        with self.assertRaises(ValueError):
+            ints[0:2] = [1]
+        with self.assertRaises(TypeError):
+            ints[0] = "a"
+
+        floats = ArrayFloat.from_list([1, 2.5, 4])
+        floats.copy_range(ArrayR.from_list([9, 9]), 0, 1, 2)
+        self.assertListEqual(floats.to_list(), [1.0, 9.0, 9.0])
+        floats.fill(0.5, 2)
+        self.assertListEqual(floats.to_list(), [1.0, 9.0, 0.5])
+        self.assertEqual(floats[::2], [1.0, 0.5])
+
+        view = ints.memoryview()
+        view[4] = 5
+        self.assertEqual(ints[4], 5)
+
+        table = EffectivenessCalculator.instance.damage_effectiveness
+        self.assertIsInstance(table, ArrayFloat)
+        self.assertEqual(EffectivenessCalculator.get_effectiveness(Element.FIRE, Element.WATER), 0.5)
+
+    @skipIf(numpy is None, "numpy is not installed")
+    @number("6.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_typed_arrays_numpy(self):
+        ints = ArrayInt.from_list([1, 2, 3])
+        values = numpy.asarray(ints)
+        self.assertEqual(values.dtype, numpy.int64)
+        # No copy: writes show up on both sides.
+        values[0] = 10
+        ints[2] = 30
+        self.assertListEqual(ints.to_list(), [10, 2, 30])
+        self.assertListEqual(values.tolist(), [10, 2, 30])
+        self.assertListEqual(numpy.asarray(ints, dtype=numpy.float64).tolist(), [10.0, 2.0, 30.0])
+
+        table = numpy.asarray(EffectivenessCalculator.instance.damage_effectiveness)
+        names = EffectivenessCalculator.instance.elemental_names
+        n = len(names)
+        self.assertEqual(table.reshape(n, n)[names.index("Fire")][names.index("Grass")], 2.0)
+
+    @number("6.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_sorted_list_bulk(self):
+        words = ["pear", "fig", "apple", "kiwi", "plum", "date", "lime", "banana", "yam"]
+        built = ArraySortedList.from_items(words, key=len)
+        # Sorted by length, equal lengths in input order.
+        self.assertListEqual(
+            [built[i].value for i in range(len(built))],
+            ["fig", "yam", "pear", "kiwi", "plum", "date", "lime", "apple", "banana"],
+        )
+        self.assertListEqual([built[i].key for i in range(len(built))], [3, 3, 4, 4, 4, 4, 4, 5, 6])
+
+        other = ArraySortedList.from_items([ListItem("a", 1), ListItem("b", 4), ListItem("c", 9)])
+        built.merge(other)
+        self.assertEqual(len(built), 12)
+        self.assertListEqual([built[i].key for i in range(len(built))], [1, 3, 3, 4, 4, 4, 4, 4, 4, 5, 6, 9])
+        # Items already in the list go before equal keys from the other list.
+        self.assertEqual(built[8].value, "b")
+        self.assertEqual(len(other), 3)
+
+        # Both leave a list that works as usual.
+        built.add(ListItem("z", 2))
+        built.delete_at_index(0)
+        self.assertEqual(built[0].value, "z")
+        empty = ArraySortedList.from_items([])
+        empty.merge(ArraySortedList(0))
+        empty.add(ListItem("x", 0))
+        self.assertEqual(len(empty), 1)
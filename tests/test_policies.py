@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from battle import Battle
+from policies import HeuristicPolicy, LookaheadPolicy
+from tests.test_battle import random_teams
+
+class TestPolicies(TestCase):
+
+    @number("4.23")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_heuristic_policy(self):
+        for seed in range(50):
+            team1, team2 = random_teams(seed)
+            team1.policy = HeuristicPolicy()
+            team2.policy = HeuristicPolicy()
+            self.assertEqual(Battle(verbosity=0).battle(team1, team2), Battle(verbosity=0).battle(*random_teams(seed)))
+
+    @number("4.24")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_lookahead_search(self):
+        policy = LookaheadPolicy(max_depth=3, time_budget=None)
+        b = Battle(verbosity=0)
+        b.team1, b.team2 = random_teams(2)
+        b.out1 = b.team1.retrieve_from_team()
+        b.out2 = b.team2.retrieve_from_team()
+        b.turn_number = 0
+        snapshot = b.snapshot()
+        action = policy.choose_action(b, 1)
+        self.assertIn(action, LookaheadPolicy.ACTIONS)
+        self.assertEqual(policy.last_depth, 3)
+        # The search runs on a fork, the battle itself is untouched.
+        self.assertEqual(b.snapshot(), snapshot)
+        self.assertGreater(policy.table_hits, 0)
+        # Deciding again is answered by the transposition table.
+        nodes = policy.nodes
+        self.assertEqual(policy.choose_action(b, 1), action)
+        self.assertEqual(policy.nodes, nodes)
+
+    @number("4.25")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(10)
+    def test_lookahead_wins_more(self):
+        policy = LookaheadPolicy(max_depth=2, time_budget=None)
+        heuristic_wins = 0
+        lookahead_wins = 0
+        for seed in range(60):
+            if Battle(verbosity=0).battle(*random_teams(seed)) == Battle.Result.TEAM1:
+                heuristic_wins += 1
+            team1, team2 = random_teams(seed)
+            team1.policy = policy
+            if Battle(verbosity=0, max_turns=500).battle(team1, team2) == Battle.Result.TEAM1:
+                lookahead_wins += 1
+        self.assertGreater(lookahead_wins, heuristic_wins)
@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from battle import Battle
+from battle_state import encode_monster, encode_team
+from random_gen import RandomGen
+from sharded_tower import ShardedTower
+from team import MonsterTeam
+from tower import BattleTower
+
+def play_tower(tower, lazy, seed=1008, n=20):
+    """
+    Plays a whole tower, returning every battle (result, lives, both teams and out monsters as the battle
+    left them, and its turn count), battles played and the final seed.
+    """
+    RandomGen.set_seed(seed)
+    tower.set_my_team(MonsterTeam(MonsterTeam.TeamMode.OPTIMISE, MonsterTeam.SelectionMode.RANDOM, sort_key=MonsterTeam.SortMode.HP))
+    tower.generate_teams(n, lazy=lazy)
+    # Enough lives to see enemies come round again.
+    tower.my_remaining_lifeforce = 40
+    battles = []
+    for result, my_team, enemy_team, my_lives, enemy_lives in tower:
+        battles.append((
+            result, my_lives, enemy_lives,
+            encode_team(my_team), encode_team(enemy_team),
+            encode_monster(tower.battle.out1), encode_monster(tower.battle.out2),
+            tower.battle.turn_number,
+        ))
+    return battles, tower.battles_played, RandomGen.seed
+
+class TestShardedTower(TestCase):
+
+    @number("5.16")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(30)
+    def test_same_as_serial(self):
+        for lazy in (True, False):
+            serial = play_tower(BattleTower(Battle(verbosity=0)), lazy)
+            self.assertGreater(serial[1], 20)
+            for workers in (1, 2):
+                with ShardedTower(Battle(verbosity=0), workers=workers, chunk_size=3) as tower:
+                    self.assertEqual(play_tower(tower, lazy), serial)
+                    self.assertTrue(tower.uses_pool())
+                    self.assertIsNone(tower.pool)
+
+        # An engine whose battles do more than return a result battles in this process.
+        tower = ShardedTower(Battle(verbosity=0, max_turns=10 ** 6))
+        self.assertEqual(play_tower(tower, True), play_tower(BattleTower(Battle(verbosity=0)), True))
+        self.assertFalse(tower.uses_pool())
+        self.assertIsNone(tower.results)
@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from battle import Battle
+from team import MonsterTeam
+from tournament import Tournament, parse_bracket
+from tests.test_battle import random_teams
+
+from data_structures.referential_array import ArrayR
+
+def balanced_bracket(names):
+    """Postfix tokens pairing up names level by level."""
+    level = [[name] for name in names]
+    while len(level) > 1:
+        level = [level[i] + level[i + 1] + ["+"] for i in range(0, len(level), 2)]
+    return level[0]
+
+class TestTournament(TestCase):
+
+    @number("5.9")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(10)
+    def test_rounds(self):
+        names = [f"T{i}" for i in range(16)]
+        teams = {name: random_teams(i)[0] for i, name in enumerate(names)}
+        specs = {name: team.to_spec() for name, team in teams.items()}
+
+        # Play the bracket by hand, one battle at a time.
+        expected_rounds = []
+        remaining = list(names)
+        while len(remaining) > 1:
+            winners = []
+            for i in range(0, len(remaining), 2):
+                left, right = remaining[i], remaining[i + 1]
+                result = Battle(verbosity=0).battle(MonsterTeam.from_spec(specs[left]), MonsterTeam.from_spec(specs[right]))
+                winners.append(right if result == Battle.Result.TEAM2 else left)
+            expected_rounds.append(winners)
+            remaining = winners
+
+        for workers in (1, 2):
+            tournament = Tournament(ArrayR.from_list(balanced_bracket(names)), teams)
+            rounds = list(tournament.play(workers=workers))
+            self.assertListEqual([r.round_number for r in rounds], [1, 2, 3, 4])
+            self.assertListEqual([[m.winner for m in r.matches] for r in rounds], expected_rounds)
+            self.assertEqual(tournament.champion, expected_rounds[-1][0])
+
+    @number("5.10")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_unbalanced_and_invalid(self):
+        teams = {name: random_teams(i)[0] for i, name in enumerate(["a", "b", "c"])}
+        # c gets a bye to the final in round 2.
+        root, rounds = parse_bracket(["a", "b", "+", "c", "+"])
+        self.assertEqual(root.round_number, 2)
+        self.assertListEqual([len(matches) for matches in rounds], [1, 1])
+        tournament = Tournament(["a", "b", "+", "c", "+"], teams)
+        final = list(tournament.play())[-1].matches[0]
+        self.assertEqual(final.right, "c")
+        self.assertEqual(tournament.champion, final.winner)
+
+        with self.assertRaises(ValueError):
+            Tournament(["a", "b", "+", "+"], teams)
+        with self.assertRaises(ValueError):
+            Tournament(["a", "b"], teams)
+        with self.assertRaises(ValueError):
+            Tournament(["a", "d", "+"], teams)
@@ -1,4 +1,7 @@
+import os
+import tempfile
 from unittest import TestCase
+from unittest.mock import patch
 
 from ed_utils.decorators import number, visibility, advanced
 from ed_utils.timeout import timeout
@@ -7,7 +10,9 @@ from random_gen import RandomGen
 from battle import Battle
 from elements import Element
 from team import MonsterTeam
-from tower import BattleTower, tournament_balanced
+import tower
+from tower import BattleTower, BattleSummary, tournament_balanced, tournament_shape
+from tower_checkpoint import LOG_HEADER, LOG_RECORD, apply_record
 from helpers import Flamikin, Faeboa
 
 from data_structures.referential_array import ArrayR
@@ -255,3 +260,239 @@ class TestTower(TestCase):
         self.assertFalse(tournament_balanced(invalid2))
         self.assertFalse(tournament_balanced(unbalanced))
         self.assertTrue(tournament_balanced(balanced))
+
+    def good_tower(self, n):
+        RandomGen.set_seed(123456789)
+        bt = BattleTower(Battle(verbosity=0))
+        bt.set_my_team(MonsterTeam(
+            team_mode=MonsterTeam.TeamMode.BACK,
+            selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+            provided_monsters=ArrayR.from_list([GoodFlamikin])
+        ))
+        bt.generate_teams(n)
+        return bt
+
+    @number("5.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_iteration(self):
+        expected = []
+        bt = self.good_tower(3)
+        while bt.battles_remaining():
+            result, team1, team2, lives1, lives2 = bt.next_battle()
+            expected.append((result, lives1, lives2))
+
+        got = []
+        bt = self.good_tower(3)
+        for result, my_team, tower_team, player_lives, tower_lives in bt:
+            self.assertIs(my_team, bt.my_team)
+            got.append((result, player_lives, tower_lives))
+        self.assertListEqual(got, expected)
+        self.assertFalse(bt.battles_remaining())
+
+    @number("5.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_summary_stream(self):
+        bt = self.good_tower(3)
+        first_enemy = bt.enemy_teams.peek()[0].to_spec()
+        stream = bt.stream(summary=True)
+        # Nothing is played until the stream is advanced.
+        self.assertEqual(len(bt.enemy_teams), 3)
+        summary = next(stream)
+        self.assertIsInstance(summary, BattleSummary)
+        self.assertEqual(summary, BattleSummary(1, Battle.Result.TEAM1, 4, 6, first_enemy))
+        summaries = [summary] + list(stream)
+        self.assertListEqual([s.battle_number for s in summaries], list(range(1, 16)))
+        self.assertEqual(summaries[-1].enemy_lives, 0)
+
+    @number("5.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @advanced()
+    @timeout()
+    def test_tournament_stream(self):
+        def bracket(depth):
+            # Postfix tokens of a balanced bracket with 2^depth teams, generated lazily.
+            if depth == 0:
+                yield "T"
+                return
+            yield from bracket(depth - 1)
+            yield from bracket(depth - 1)
+            yield "+"
+
+        self.assertEqual(tournament_shape(bracket(16)), (2 ** 16, 16))
+        self.assertEqual(tournament_shape(iter(["T1"])), (1, 0))
+        self.assertIsNone(tournament_shape(iter([])))
+        self.assertIsNone(tournament_shape(iter(["+"])))
+        # A bracket that can never balance is rejected before the rest of the stream is read.
+        tokens = iter(["a", "b", "+", "c", "d", "e"] + ["f"] * 100)
+        self.assertIsNone(tournament_shape(tokens))
+        self.assertEqual(len(list(tokens)), 100)
+
+    @number("5.11")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_lazy_generation(self):
+        runs = []
+        for lazy in (False, True):
+            RandomGen.set_seed(123456789)
+            bt = BattleTower(Battle(verbosity=0))
+            bt.set_my_team(MonsterTeam(
+                team_mode=MonsterTeam.TeamMode.BACK,
+                selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+                provided_monsters=ArrayR.from_list([Faeboa])
+            ))
+            bt.generate_teams(6, lazy=lazy)
+            # Both modes leave the random generator in the same place.
+            got = [RandomGen.random()]
+            while bt.battles_remaining():
+                result, my_team, tower_team, lives1, lives2 = bt.next_battle()
+                got.append((result, tower_team.to_spec(), lives1, lives2, bt.out_of_meta().to_list()))
+            runs.append(got)
+        self.assertListEqual(runs[1], runs[0])
+        # Lazily generated teams wait in the roster as (packed monster ids, lives).
+        RandomGen.set_seed(123456789)
+        bt = BattleTower(Battle(verbosity=0))
+        bt.generate_teams(3, lazy=True)
+        self.assertIsInstance(bt.enemy_teams.peek()[0], int)
+
+    def checkpoint_tower(self, lazy):
+        RandomGen.set_seed(2085)
+        bt = BattleTower(Battle(verbosity=0))
+        bt.set_my_team(MonsterTeam(MonsterTeam.TeamMode.BACK, MonsterTeam.SelectionMode.RANDOM))
+        bt.generate_teams(6, lazy=lazy)
+        return bt
+
+    def play_rest(self, bt):
+        got = []
+        for result, my_team, tower_team, lives1, lives2 in bt:
+            got.append((result, tower_team.to_spec(), lives1, lives2, bt.out_of_meta().to_list()))
+        return got, RandomGen.random()
+
+    @number("5.12")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_checkpoint_resume(self):
+        for lazy in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "tower.ckpt")
+                bt = self.checkpoint_tower(lazy)
+                bt.next_battle()
+                bt.next_battle()
+                bt.checkpoint(path)
+                bt.next_battle()
+                bt.sort_by_lives()
+                bt.next_battle()
+                seed = RandomGen.seed
+                expected = self.play_rest(bt)
+                bt.close_log()
+
+                # Pretend the run crashed after the fourth battle, in the middle of writing the fifth record.
+                with open(path + ".log", "r+b") as log:
+                    log.truncate(LOG_HEADER.size + 3 * LOG_RECORD.size + 7)
+                RandomGen.set_seed(seed)
+                resumed = BattleTower.resume(path, Battle(verbosity=0))
+                self.assertEqual(resumed.battles_played, 4)
+                self.assertEqual(resumed.lazy, lazy)
+                self.assertEqual(self.play_rest(resumed), expected)
+                resumed.close_log()
+
+    @number("5.13")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_resume_custom_team(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tower.ckpt")
+            bt = self.good_tower(3)
+            bt.checkpoint(path)
+            bt.close_log()
+            with self.assertRaises(ValueError):
+                BattleTower.resume(path)
+            my_team = MonsterTeam(
+                team_mode=MonsterTeam.TeamMode.BACK,
+                selection_mode=MonsterTeam.SelectionMode.PROVIDED,
+                provided_monsters=ArrayR.from_list([GoodFlamikin])
+            )
+            resumed = BattleTower.resume(path, my_team=my_team)
+            self.assertEqual(len(list(resumed)), 15)
+            resumed.close_log()
+
+    @number("5.17")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_sort_one_life_left(self):
+        bt = self.good_tower(3)
+        # Battle each team until the first is down to its last life.
+        while bt.enemy_teams.peek()[1] > 1:
+            bt.next_battle()
+        # Below MIN_LIVES, but still in the roster.
+        bt.sort_by_lives()
+        sorted_lives = []
+        for _ in range(len(bt.enemy_teams)):
+            entry = bt.enemy_teams.serve()
+            sorted_lives.append(entry[1])
+            bt.enemy_teams.append(entry)
+        self.assertEqual(sorted_lives[0], 1)
+        self.assertEqual(sorted_lives, sorted(sorted_lives))
+
+    @number("5.18")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_checkpoint_old_log(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tower.ckpt")
+            bt = self.checkpoint_tower(True)
+            bt.next_battle()
+            bt.checkpoint(path)
+            bt.next_battle()
+            bt.sort_by_lives()
+            bt.next_battle()
+            with open(path + ".log", "rb") as log:
+                old_log = log.read()
+            bt.checkpoint(path)
+            expected = self.play_rest(bt)
+            bt.close_log()
+
+            # Pretend the run crashed after the new checkpoint replaced the old one, but before
+            # its log was started: the old log, sort included, is already in the new checkpoint.
+            with open(path + ".log", "wb") as log:
+                log.write(old_log)
+            resumed = BattleTower.resume(path, Battle(verbosity=0))
+            self.assertEqual(resumed.battles_played, 3)
+            self.assertEqual(self.play_rest(resumed), expected)
+            resumed.close_log()
+
+            # Records the tower already includes are skipped, a gap is an error.
+            resumed = BattleTower.resume(path, Battle(verbosity=0))
+            played = resumed.battles_played
+            lives = resumed.my_remaining_lifeforce
+            apply_record(resumed, (played, Battle.Result.TEAM2.value, 0, 0, 0))
+            self.assertEqual((resumed.battles_played, resumed.my_remaining_lifeforce), (played, lives))
+            with self.assertRaises(ValueError):
+                apply_record(resumed, (played + 2, Battle.Result.TEAM2.value, 0, 0, 0))
+            resumed.close_log()
+
+    @number("5.19")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout()
+    def test_tournament_depth_limit(self):
+        def bracket(depth):
+            if depth == 0:
+                return ["T"]
+            return bracket(depth - 1) + bracket(depth - 1) + ["+"]
+
+        # The same rules with a smaller limit, so brackets at and past it are small enough to build.
+        with patch.object(tower, "MAX_TOURNAMENT_DEPTH", 3):
+            self.assertEqual(tournament_shape(bracket(3)), (8, 3))
+            self.assertIsNone(tournament_shape(bracket(4)))
+            # Two trees of every depth, never joined: as deep a stack as tokens can make.
+            # It is rejected, not overflowed, as soon as a tree lands on an equal pair.
+            pairs = []
+            for depth in range(3, -1, -1):
+                pairs += bracket(depth) + bracket(depth)
+            tokens = iter(pairs + ["+"] * 8)
+            self.assertIsNone(tournament_shape(tokens))
+            self.assertGreater(len(list(tokens)), 0)
+            # Growing a partner above an equal pair would only leave the lower tree unmatched.
+            self.assertIsNone(tournament_shape(bracket(1) + bracket(1) + bracket(0) + bracket(0) + ["+", "+", "+"]))
+
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from ed_utils.timeout import timeout
+
+from battle import Battle
+from team import MonsterTeam
+from tower import BattleTower
+from random_gen import RandomGen
+from tower_sim import TowerConfig, TowerStats, run_tower, simulate
+from tests.test_battle import random_teams
+
+def sim_configs(m):
+    """m campaigns over a few random player teams, with mixed tower sizes and eager/lazy rosters."""
+    specs = [random_teams(i)[0].to_spec() for i in range(4)]
+    return [TowerConfig(1000 + i, specs[i % 4], 3 + i % 5, lazy=i % 2 == 0) for i in range(m)]
+
+class TestTowerSim(TestCase):
+
+    @number("5.14")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(20)
+    def test_matches_next_battle_loop(self):
+        configs = sim_configs(12)
+        stats, records = simulate(configs, keep_records=True)
+
+        # The same campaigns, played with the usual loop around next_battle.
+        for config, record in zip(configs, records):
+            RandomGen.set_seed(config.seed)
+            tower = BattleTower(Battle(verbosity=0))
+            tower.set_my_team(MonsterTeam.from_spec(config.team_spec))
+            tower.generate_teams(config.n_teams, lazy=config.lazy)
+            battles = 0
+            while tower.battles_remaining():
+                tower.next_battle()
+                battles += 1
+            self.assertEqual(record.seed, config.seed)
+            self.assertEqual(record.battles, battles)
+            self.assertEqual(record.my_lives, tower.my_remaining_lifeforce)
+            self.assertEqual(record.enemies_left, len(tower.enemy_teams))
+
+        self.assertEqual(stats.towers, 12)
+        self.assertEqual(stats.towers_won, sum(record.won for record in records))
+        self.assertEqual(sum(stats.results), sum(record.battles for record in records))
+        self.assertEqual(sum(stats.enemy_lives), sum(stats.results))
+        self.assertEqual(sum(stats.my_lives), 12)
+        self.assertAlmostEqual(stats.battles_survived.mean, sum(r.battles for r in records) / 12)
+
+    @number("5.15")
+    @visibility(visibility.VISIBILITY_SHOW)
+    @timeout(30)
+    def test_merge_and_workers(self):
+        configs = sim_configs(10)
+        one, records = simulate(configs, keep_records=True, chunk_size=3)
+        two, records_two = simulate(configs, workers=2, keep_records=True, chunk_size=4)
+        self.assertEqual(records, records_two)
+        summary = one.summary()
+        other = two.summary()
+        for key in ("towers", "win_rate", "battles", "results", "my_lives", "enemy_lives", "element_frequency"):
+            self.assertEqual(summary[key], other[key])
+        for key in summary["battles_survived"]:
+            self.assertAlmostEqual(summary["battles_survived"][key], other["battles_survived"][key])
+
+        # Merging per-campaign stats in any grouping gives the same totals.
+        parts = []
+        for config in configs:
+            part = TowerStats()
+            run_tower(config, part)
+            parts.append(part)
+        left, right = TowerStats(), TowerStats()
+        for part in parts[:4]:
+            left.merge(part)
+        for part in parts[4:]:
+            right.merge(part)
+        right.merge(left)
+        self.assertEqual(right.summary()["enemy_lives"], summary["enemy_lives"])
+        self.assertEqual(right.summary()["element_frequency"], summary["element_frequency"])
+        self.assertAlmostEqual(right.battles_survived.variance(), one.battles_survived.variance())
+        self.assertEqual(simulate([])[0].summary()["towers"], 0)
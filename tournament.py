@@ -0,0 +1,151 @@
+"""
+Plays out a tournament bracket, round by round.
+
+Brackets use the postfix format of tower.tournament_balanced: team names, with "+" joining the
+two brackets before it into a match between their winners. A match is in round r when the deeper
+of its two sides took r - 1 rounds to decide, so every match of a round only depends on earlier
+rounds, and all of them are battled together with battle_pool.battle_many on one process pool.
+A balanced bracket of n teams is decided in log2(n) rounds.
+
+The winner of a match goes on as a freshly regenerated team (teams travel as MonsterTeam specs,
+see battle_pool). On a draw the left side advances.
+
+Usage:
+```
+tournament = Tournament(ArrayR.from_list(["a", "b", "+", "c", "d", "+", "+"]), teams)
+for round_result in tournament.play(workers=4):
+    print(round_result.round_number, round_result.matches)
+print(tournament.champion)
+```
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Mapping, NamedTuple, Optional, Union
+
+from battle import Battle
+from battle_pool import TeamSpec, as_spec, battle_many, make_pool
+from team import MonsterTeam
+
+
+class BracketNode:
+    """
+    A team (a leaf, with a name) or a match between the winners of left and right.
+
+    Attributes:
+        round_number (int): 0 for a team, otherwise the round the match is played in
+        winner (str): name of the team that came out of this part of the bracket, None until decided
+    """
+
+    def __init__(self, name: Optional[str] = None, left: BracketNode = None, right: BracketNode = None) -> None:
+        self.name = name
+        self.left = left
+        self.right = right
+        if name is not None:
+            self.round_number = 0
+            self.winner = name
+        else:
+            self.round_number = max(left.round_number, right.round_number) + 1
+            self.winner = None
+
+
+class MatchResult(NamedTuple):
+    left: str
+    right: str
+    result: Battle.Result
+    winner: str
+
+
+class RoundResult(NamedTuple):
+    round_number: int
+    matches: list[MatchResult]
+
+
+def parse_bracket(tokens: Iterable[str]) -> tuple[BracketNode, list[list[BracketNode]]]:
+    """
+    Builds the tree of a postfix bracket, and lists its matches by round (rounds[0] is round 1).
+    :raises ValueError: if the bracket is not well formed.
+    :complexity: O(n) for n tokens.
+    """
+    stack = []
+    rounds = []
+    for token in tokens:
+        if token == "+":
+            if len(stack) < 2:
+                raise ValueError("'+' needs two brackets to join.")
+            right = stack.pop()
+            left = stack.pop()
+            node = BracketNode(left=left, right=right)
+            if node.round_number > len(rounds):
+                rounds.append([])
+            rounds[node.round_number - 1].append(node)
+            stack.append(node)
+        else:
+            stack.append(BracketNode(name=token))
+    if len(stack) != 1:
+        raise ValueError("A bracket should join into exactly one tournament.")
+    return stack[0], rounds
+
+
+class Tournament:
+    """
+    Attributes:
+        root (BracketNode): the final
+        rounds (list): the matches of every round, in bracket order
+        champion (str): the winner, None until the tournament has been played
+    """
+
+    def __init__(self, bracket: Iterable[str], teams: Mapping[str, Union[MonsterTeam, TeamSpec]]) -> None:
+        """
+        :bracket: postfix tokens, as for tower.tournament_balanced.
+        :teams: the team (or team spec) of every name in the bracket.
+        :raises ValueError: if the bracket is not well formed or names a team not in teams.
+        """
+        self.root, self.rounds = parse_bracket(bracket)
+        self.specs = {}
+        for name, team in teams.items():
+            self.specs[name] = as_spec(team)
+        self._check_names(self.root)
+        self.champion = None
+
+    def _check_names(self, root: BracketNode) -> None:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.name is not None:
+                if node.name not in self.specs:
+                    raise ValueError(f"Team {node.name} is not in the tournament.")
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+
+    def play(self, workers: int = 1, seed: Optional[int] = None) -> Iterator[RoundResult]:
+        """
+        Plays the tournament, yielding the results of each round as soon as it is decided.
+        Every round is one battle_many call on a pool kept open for the whole tournament.
+
+        :workers: worker processes. 1 or fewer plays every match in this process.
+        :seed: base seed for battle_many, offset by the round number.
+
+        Complexity: O(R x (round matches x battle / workers)) wall time for R rounds.
+        """
+        pool = make_pool(workers) if workers > 1 else None
+        try:
+            for round_number, matches in enumerate(self.rounds, start=1):
+                pairs = [(self.specs[match.left.winner], self.specs[match.right.winner]) for match in matches]
+                # Spread each round evenly over the workers, however few matches it has left.
+                chunk_size = max(1, -(-len(pairs) // (max(1, workers) * 4)))
+                results = battle_many(
+                    pairs,
+                    seed=None if seed is None else seed + round_number,
+                    chunk_size=chunk_size,
+                    pool=pool,
+                )
+                match_results = []
+                for match, result in zip(matches, results):
+                    match.winner = match.right.winner if result == Battle.Result.TEAM2 else match.left.winner
+                    match_results.append(MatchResult(match.left.winner, match.right.winner, result, match.winner))
+                yield RoundResult(round_number, match_results)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.champion = self.root.winner
@@ -1,13 +1,28 @@
 from __future__ import annotations
+from typing import Iterable, Iterator, NamedTuple, Optional
 
 from random_gen import RandomGen
 from team import MonsterTeam
 from battle import Battle
+from helpers import get_monster_by_id, pack_monster_ids, unpack_monster_ids
+from tower_checkpoint import write_checkpoint, read_checkpoint, append_record
 
 from elements import Element
 
 from data_structures.referential_array import ArrayR
-from data_structures.stack_adt import *
+from data_structures.queue_adt import CircularQueue
+from data_structures.stack_adt import ArrayStack
+from data_structures.bset import BSet
+from data_structures.bucket_sort import bucket_sort
+
+class BattleSummary(NamedTuple):
+    """What BattleTower.stream(summary=True) yields for each battle."""
+    battle_number: int
+    result: Battle.Result
+    my_lives: int
+    enemy_lives: int
+    enemy_spec: Optional[tuple]     # MonsterTeam.to_spec of the enemy team, None if it can't be described
+
 
 class BattleTower:
 
@@ -19,7 +34,11 @@ class BattleTower:
         self.my_team = None
         self.my_remaining_lifeforce = None
         self.enemy_capacity = None
-        self.enemy_teams_stack = None
+        self.enemy_teams = None
+        self.seen_elements = BSet()
+        self.lazy = False
+        self.battles_played = 0
+        self.log = None
         """
         As it is self initialisation the best and worse case complexity is O(1)
         """
@@ -33,29 +52,61 @@ class BattleTower:
         best and worse complexity is O(1) for random and and assignment of value of input
         """       
 
-    def generate_teams(self, n: int) -> None:
+    def generate_teams(self, n: int, lazy: bool = False) -> None:
         self.enemy_capacity = n
-        self.enemy_teams_stack = ArrayStack(n)
+        self.enemy_teams = CircularQueue(n)
+        self.seen_elements = BSet()
+        self.lazy = lazy
+        self.battles_played = 0
         for _ in range(n):
-            opposing_team = MonsterTeam(team_mode = MonsterTeam.TeamMode.BACK, selection_mode = MonsterTeam.SelectionMode.RANDOM)
+            if lazy:
+                opposing_team = pack_monster_ids(MonsterTeam.random_monster_ids())
+            else:
+                opposing_team = MonsterTeam(team_mode = MonsterTeam.TeamMode.BACK, selection_mode = MonsterTeam.SelectionMode.RANDOM)
             enemy_remaining_lifeforce = RandomGen.randint(self.MIN_LIVES, self.MAX_LIVES)
 
             opposing_team_tuple = (opposing_team , enemy_remaining_lifeforce)
-            self.enemy_teams_stack.push(opposing_team_tuple)
-        self.flip_stack(self.enemy_teams_stack)
+            self.enemy_teams.append(opposing_team_tuple)
         """
-        I am creating a stack for the required input capacity. 
+        I am creating a circular queue for the required input capacity.
         The FOR loop creates each enemy teams their amount of lives, then we put it in a tuple.
-        and add it to the stack as a tuple so we have both pieces of information together
-        Then in the end we flip the stack so its the first item we added.
-        So the best and worst case is O(Enemy_Stack) + O(Capacity x (TEAM_Creator)) + O(Capacity) + O(Enemy_Stack) 
-                                        = O(Enemy_Stack) + O(Capacity x (TEAM_Creator)), 
+        and add it to the back of the queue as a tuple so we have both pieces of information together,
+        so the first team generated is the first one served.
+        So the best and worst case is O(Capacity) + O(Capacity x (TEAM_Creator)) = O(Capacity x (TEAM_Creator)),
                                         team creator = complexity of creating enemy team
 
+        With lazy, only the monster ids of each team are picked (drawing the same random numbers, in the
+        same order, as creating the team would) and stored packed into one int, see pack_monster_ids.
+        The MonsterTeam is only created when the team comes up in next_battle, and dropped again afterwards,
+        so each waiting team costs around 160 bytes instead of the 1.8KB of a team and its monsters.
         """     
 
+    def enemy_team(self, entry: tuple) -> MonsterTeam:
+        enemy_team = entry[0]
+        if isinstance(enemy_team, int):
+            return MonsterTeam.from_spec((MonsterTeam.TeamMode.BACK.value, 0, unpack_monster_ids(enemy_team)))
+        enemy_team.regenerate_team()
+        return enemy_team
+        """
+        The team of a roster entry, ready to battle: a new team for a lazily generated entry,
+        the regenerated team otherwise. Complexity is O(Regeneration) either way.
+        """
+
+    def enemy_element_set(self, entry: tuple) -> BSet:
+        enemy_team = entry[0]
+        if isinstance(enemy_team, int):
+            elements = BSet()
+            for monster_id in unpack_monster_ids(enemy_team):
+                elements.add(Element.from_string(get_monster_by_id(monster_id).get_element()).value)
+            return elements
+        return enemy_team.element_set()
+        """
+        The elements of a roster entry, without creating the team of a lazily generated one.
+        Complexity is O(1) for a cached team, O(Team_Size x from_string) for a lazy one.
+        """
+
     def battles_remaining(self) -> bool:
-        return self.my_remaining_lifeforce > 0 and len(self.enemy_teams_stack) > 0
+        return self.my_remaining_lifeforce > 0 and len(self.enemy_teams) > 0
         """
         This checks if my_team has any lives left and that there are enemy teams left 
         complexity is O(1)
@@ -64,9 +115,11 @@ class BattleTower:
 
     def next_battle(self) -> tuple[Battle.Result, MonsterTeam, MonsterTeam, int, int]:
         self.my_team.regenerate_team()
-        enemy_team, enemy_remaining_lifeforce = self.enemy_teams_stack.pop()
-        enemy_team.regenerate_team()
-        battle_outcome = self.battle.battle(self.my_team, enemy_team)
+        enemy_entry = self.enemy_teams.serve()
+        enemy_team = self.enemy_team(enemy_entry)
+        enemy_remaining_lifeforce = enemy_entry[1]
+        self.seen_elements = self.seen_elements | self.my_team.element_set() | enemy_team.element_set()
+        battle_outcome = self.battle_result(enemy_entry, enemy_team)
         if battle_outcome == Battle.Result.TEAM1:
             enemy_remaining_lifeforce -=1
         elif battle_outcome == Battle.Result.TEAM2:
@@ -75,56 +128,202 @@ class BattleTower:
             enemy_remaining_lifeforce -=1
             self.my_remaining_lifeforce -=1
         
-        self.flip_stack(self.enemy_teams_stack)
         if enemy_remaining_lifeforce > 0:
-            self.enemy_teams_stack.push((enemy_team , enemy_remaining_lifeforce))
-        self.flip_stack(self.enemy_teams_stack)
+            self.enemy_teams.append((enemy_entry[0] , enemy_remaining_lifeforce))
+        self.battles_played += 1
+        if self.log is not None:
+            append_record(self.log, self, battle_outcome, enemy_remaining_lifeforce)
 
         return (battle_outcome , self.my_team , enemy_team , self.my_remaining_lifeforce , enemy_remaining_lifeforce)
         """
-        First thing I am doing is regenerating both teams. 
+        First thing I am doing is regenerating both teams (creating the enemy team if it was generated lazily).
         Which has a complexity of O(Regeneration), Regeneration = complexity
 
+        Serving the next enemy team from the front of the queue is O(1).
+        Adding the elements of both teams to seen_elements is a union of bit vectors, O(Elements / Word_Size).
+
         Next thing we do is battle between my team and enemy time. 
         So the complexity function is O(Fight_Begins), Fight_Begins = complexity of the battle function
 
         The IF statements have a complexity of O(Final_Comparison), 
         Final_Comparison = complexity of the comparison of battle.result function
 
-        Then I call upon flip stack which has a complexity best and worst case is O(Capacity + Enemy_Stack)
+        If the enemy team still has lives it goes to the back of the queue, which is O(1).
+        After a checkpoint, the battle is also appended to the checkpoint's log, which is O(1).
+        The queue never holds more than Capacity teams as one is served before it is appended.
+
+        Complexity overall is O(Regeneration) + O(Regeneration) + O(Fight_Begins) + O(Final_Comparison) + O(1)
+                                = O(Regeneration + Fight_Begins + Final_Comparison)
+        """
+
+    def battle_result(self, enemy_entry: tuple, enemy_team: MonsterTeam) -> Battle.Result:
+        return self.battle.battle(self.my_team, enemy_team)
+        """
+        Battles my team against the team of the enemy entry, ready to battle.
+        Subclasses that get results some other way (see sharded_tower) override this.
+        Complexity is O(Fight_Begins).
+        """
 
-        Then i call upon flip stack again.
+    def __iter__(self) -> Iterator[tuple[Battle.Result, MonsterTeam, MonsterTeam, int, int]]:
+        return self.stream()
+        """
+        Iterating over the tower plays it battle by battle, see stream.
+        """
 
-        Complexity overall is O(Regeneration) + O(Regeneration) + O(Fight_Begins) + O(Final_Comparison) + O(Capacity + Enemy_Stack) + O(Capacity + Enemy_Stack)
-                                = O(Regeneration + Fight_Begins + Final_Comparison + Capacity + Enemy_Stack)
+    def stream(self, summary: bool = False) -> Iterator:
+        battle_number = 0
+        while self.battles_remaining():
+            outcome = self.next_battle()
+            battle_number += 1
+            if summary:
+                battle_outcome, _, enemy_team, my_lives, enemy_lives = outcome
+                try:
+                    enemy_spec = enemy_team.to_spec()
+                except ValueError:
+                    enemy_spec = None
+                yield BattleSummary(battle_number, battle_outcome, my_lives, enemy_lives, enemy_spec)
+            else:
+                yield outcome
+        """
+        A generator that plays one battle each time it is advanced, until battles_remaining is False.
+        By default it yields what next_battle returns. With summary it yields a BattleSummary instead,
+        which holds no team objects, so a long run consumed as a stream keeps no teams alive.
+        Each step is O(next_battle), plus O(Team_Size) for the spec in summary mode.
         """
 
+    def checkpoint(self, path: str) -> None:
+        write_checkpoint(self, path)
+        """
+        Saves the tower to path in a compact binary format, and logs every later battle next to it,
+        so resume can carry on from the last completed battle (see tower_checkpoint).
+        Complexity is O(Enemy_Teams), and O(1) per battle afterwards for the log.
+        """
+
+    @classmethod
+    def resume(cls, path: str, battle: Battle|None=None, my_team: MonsterTeam|None=None) -> BattleTower:
+        tower = cls(battle)
+        read_checkpoint(tower, path, my_team)
+        return tower
+        """
+        A tower carrying on from the checkpoint at path and the battles logged after it.
+        my_team is only needed when the checkpointed team could not be described by a spec
+        (a team of custom monster classes). Complexity is O(Enemy_Teams + Logged_Battles).
+        """
+
+    def close_log(self) -> None:
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
     def out_of_meta(self) -> ArrayR[Element]:
-        raise NotImplementedError
-
-    def flip_stack(self, team_stack):
-        new_stack = ArrayStack(self.enemy_capacity)
-        while len(self.enemy_teams_stack):
-            team = team_stack.pop()
-            new_stack.push(team)
-        self.enemy_teams_stack = new_stack
-        """
-        This creates a new stack with the required capacity. So the complexity is O(Capacity)
-        The WHILE loop runs until we take each elemnt out of the enemy team and add it to a stack 
-        so the order is reversed when we are dequeuing the monster at the front
-        Complexity of while loop is O(Enemy_Stack), Enemy_Stack = len(self.enemy_teams_stack)
-        So overall complexity best and worst case is O(Capacity + Enemy_Stack)
-        """     
-        
+        current = self.my_team.element_set()
+        if len(self.enemy_teams) > 0:
+            current = current | self.enemy_element_set(self.enemy_teams.peek())
+        missing = self.seen_elements.difference(current).elems
 
+        out = ArrayR(missing.bit_count())
+        i = 0
+        while missing:
+            lowest = missing & -missing
+            out[i] = Element(lowest.bit_length())
+            missing ^= lowest
+            i += 1
+        return out
+        """
+        The elements of every team that has battled so far are kept in seen_elements, a BSet built up
+        one battle at a time in next_battle. The current pair is my team and the enemy team at the front
+        of the queue, and each team caches its own elements as a BSet (see MonsterTeam.element_set).
+        So the out of meta elements are one set difference of bit vectors, which is O(Elements / Word_Size),
+        O(1) for the 18 elements, instead of looking at every monster of every team again.
+        Then each set bit is turned into its Element, lowest value first, which gives Element order.
+        Overall complexity best and worst case is O(Elements / Word_Size + Out) where Out is the number of elements returned.
+        """
 
     def sort_by_lives(self):
         # 1054 ONLY
-        raise NotImplementedError
+        self.sort_roster()
+        if self.log is not None:
+            append_record(self.log, self, None)
+        """
+        Sorts the roster (see sort_roster) and, after a checkpoint, logs that it did, which is O(1).
+        Complexity is O(sort_roster).
+        """
+
+    def sort_roster(self) -> None:
+        roster = ArrayR(len(self.enemy_teams))
+        for i in range(len(roster)):
+            roster[i] = self.enemy_teams.serve()
+        # Teams start with MIN_LIVES to MAX_LIVES lives, and stay in the roster down to 1.
+        roster = bucket_sort(roster, lambda enemy: enemy[1], 1, self.MAX_LIVES)
+        for i in range(len(roster)):
+            self.enemy_teams.append(roster[i])
+        """
+        Enemy lives are integers between 1 and MAX_LIVES, so instead of comparing teams
+        the roster is counting sorted by lives (see data_structures.bucket_sort).
+        Serving every team into an array keeps the current battle order, and the counting sort is stable,
+        so teams with the same lives stay in the order they would have battled in.
+        Then every team goes back into the queue, fewest lives first.
+        Complexity best and worst case is O(Enemy_Teams + MAX_LIVES)
+        """
+
+MAX_TOURNAMENT_DEPTH = 64
+
+def tournament_shape(tournament: Iterable[str]) -> Optional[tuple[int, int]]:
+    depths = ArrayStack(MAX_TOURNAMENT_DEPTH + 2)
+    teams = 0
+    for token in tournament:
+        if token == "+":
+            if len(depths) < 2:
+                return None
+            right = depths.pop()
+            left = depths.pop()
+            if left != right:
+                return None
+            depth = left + 1
+            if depth > MAX_TOURNAMENT_DEPTH:
+                return None
+        else:
+            teams += 1
+            depth = 0
+        # The depths must strictly decrease from the bottom, except for an equal pair on top,
+        # and the next token after an equal pair has to be the "+" joining it.
+        if len(depths) > 0 and depths.peek() < depth:
+            return None
+        if len(depths) > 1:
+            top = depths.pop()
+            below = depths.peek()
+            depths.push(top)
+            if below == top:
+                return None
+        if depths.is_full():
+            return None
+        depths.push(depth)
+    if len(depths) != 1:
+        return None
+    return (teams, depths.peek())
+    """
+    Reads a postfix bracket one token at a time, so any iterable of tokens works, including a generator
+    over a bracket far too big to hold in memory. A team is a tree of depth 0 and "+" joins the two trees
+    on top of the stack, which must have the same depth for the bracket to be balanced.
+    Returns (number of teams, depth) for a well formed, balanced bracket, None otherwise.
+
+    The stack only keeps depths, and in a balanced bracket they strictly decrease from the bottom,
+    except that the top two can be equal until their "+" comes. Once a tree sits on an equal pair,
+    the upper tree of the pair can only be joined to what grows above it, which leaves the lower one
+    next to a deeper tree for good, so that is rejected straight away along with increasing depths.
+    Depths are at most MAX_TOURNAMENT_DEPTH, so the stack never holds more than
+    MAX_TOURNAMENT_DEPTH + 2 depths (2^64 teams); a full stack is rejected rather than overflowed.
+    Complexity best case is O(1) when the first tokens already break the rules,
+    worst case is O(Tokens) as every token is one push and at most two pops.
+    """
 
 def tournament_balanced(tournament_array: ArrayR[str]):
     # 1054 ONLY
-    raise NotImplementedError
+    return tournament_shape(tournament_array) is not None
+    """
+    A bracket is balanced if it is well formed and every "+" joins two brackets of the same size,
+    see tournament_shape. Complexity is O(tournament_shape).
+    """
 
 if __name__ == "__main__":
 
@@ -0,0 +1,208 @@
+"""
+Binary checkpoints and an append-only battle log for BattleTower campaigns.
+
+A checkpoint holds everything a tower needs to carry on: the RandomGen seed, the battle count,
+my team (as a spec) and lives, the elements seen so far and the enemy roster, each team as packed
+monster ids (helpers.pack_monster_ids) with its lives. Writing one is O(roster size).
+
+After a checkpoint, every battle the tower plays appends one fixed size record to the log next to
+it (path + LOG_SUFFIX). A battle only ever serves the enemy at the front of the roster and requeues
+it if it has lives left, so a record (result and both lives after the battle) is enough to redo
+its effect on the roster without battling again. sort_by_lives is logged too, as a record with
+result SORT_RECORD, as it reorders the roster without a battle. resume reads the checkpoint, applies every
+complete record of the log, and keeps appending to it. A record cut short by a crash is dropped.
+
+The log starts with a header holding the CRC32 of the checkpoint it follows. Writing a checkpoint
+replaces the checkpoint file before it can start the new log, so a crash in between leaves the new
+checkpoint next to the old log, whose records it already includes. That log's header does not match
+the checkpoint, so resume ignores it and starts a new one. Records are also checked against the
+battle count: a record the checkpoint already includes is skipped, and a gap is an error.
+
+File layout, little endian:
+    header   magic, version, RandomGen seed, battles played, my lives, lazy flag, seen elements,
+             roster capacity
+    my team  team mode, sort key, number of ids, then one byte per id (0 ids if it has no spec)
+    roster   number of entries, then (packed monster ids, lives) per entry
+    log      magic, CRC32 of the checkpoint, then
+             (battle number, result, my lives, enemy lives, RandomGen seed) per battle
+"""
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from typing import TYPE_CHECKING, BinaryIO, Optional
+
+from battle import Battle
+from helpers import pack_monster_ids
+from random_gen import RandomGen
+from team import MonsterTeam
+
+from data_structures.bset import BSet
+from data_structures.queue_adt import CircularQueue
+
+if TYPE_CHECKING:
+    from tower import BattleTower
+
+MAGIC = b"BTWR"
+VERSION = 1
+LOG_SUFFIX = ".log"
+
+HEADER = struct.Struct("<4sBQIBBQI")
+TEAM_HEADER = struct.Struct("<BBB")
+ROSTER_LENGTH = struct.Struct("<I")
+ROSTER_ENTRY = struct.Struct("<QB")
+LOG_MAGIC = b"BLOG"
+LOG_HEADER = struct.Struct("<4sI")
+LOG_RECORD = struct.Struct("<IBBBQ")
+# Result value of the record logged for sort_by_lives, no Battle.Result has it.
+SORT_RECORD = 0
+
+
+def roster_code(entry: tuple) -> int:
+    """Packed monster ids of a roster entry, whether it is lazy or holds a team."""
+    enemy_team = entry[0]
+    if isinstance(enemy_team, int):
+        return enemy_team
+    return pack_monster_ids(enemy_team.to_spec()[2])
+
+
+def write_checkpoint(tower: BattleTower, path: str) -> None:
+    """
+    Writes tower to path, then starts an empty log next to it.
+    :raises ValueError: if an enemy team holds a monster outside the catalog.
+    :complexity: O(n) for n teams in the roster.
+    """
+    try:
+        spec = tower.my_team.to_spec()
+    except ValueError:
+        # Teams of custom monster classes have no spec, resume has to be given the team.
+        spec = (0, 0, ())
+
+    chunks = [
+        HEADER.pack(
+            MAGIC, VERSION, RandomGen.seed, tower.battles_played, tower.my_remaining_lifeforce,
+            tower.lazy, tower.seen_elements.elems, tower.enemy_capacity,
+        ),
+        TEAM_HEADER.pack(spec[0], spec[1], len(spec[2])),
+        bytes(spec[2]),
+        ROSTER_LENGTH.pack(len(tower.enemy_teams)),
+    ]
+    roster = tower.enemy_teams
+    capacity = len(roster.array)
+    for i in range(len(roster)):
+        entry = roster.array[(roster.front + i) % capacity]
+        chunks.append(ROSTER_ENTRY.pack(roster_code(entry), entry[1]))
+
+    data = b"".join(chunks)
+    # Write and rename, so a crash while writing leaves the previous checkpoint in place.
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    tower.close_log()
+    tower.log = open(path + LOG_SUFFIX, "wb")
+    tower.log.write(LOG_HEADER.pack(LOG_MAGIC, zlib.crc32(data)))
+    tower.log.flush()
+
+
+def read_checkpoint(tower: BattleTower, path: str, my_team: Optional[MonsterTeam] = None) -> None:
+    """
+    Loads the checkpoint at path, and the records of its log, into tower, and reopens the log for appending.
+    A log that belongs to another checkpoint is ignored and replaced by a new one.
+    :raises ValueError: if the file is not a tower checkpoint, my_team is needed and not given,
+        or the log skips a battle.
+    :complexity: O(n + b) for n teams in the roster and b battles in the log.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, battles, my_lives, lazy, seen, capacity = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} tower checkpoint.")
+    offset = HEADER.size
+
+    team_mode, sort_key, n_ids = TEAM_HEADER.unpack_from(data, offset)
+    offset += TEAM_HEADER.size
+    monster_ids = tuple(data[offset:offset + n_ids])
+    offset += n_ids
+    if my_team is None:
+        if n_ids == 0:
+            raise ValueError("The checkpointed team has no spec, pass my_team to resume.")
+        my_team = MonsterTeam.from_spec((team_mode, sort_key, monster_ids))
+
+    (length,) = ROSTER_LENGTH.unpack_from(data, offset)
+    offset += ROSTER_LENGTH.size
+    tower.enemy_capacity = capacity
+    tower.enemy_teams = CircularQueue(capacity)
+    tower.lazy = bool(lazy)
+    for _ in range(length):
+        code, lives = ROSTER_ENTRY.unpack_from(data, offset)
+        offset += ROSTER_ENTRY.size
+        if tower.lazy:
+            tower.enemy_teams.append((code, lives))
+        else:
+            tower.enemy_teams.append((tower.enemy_team((code, lives)), lives))
+
+    tower.my_team = my_team
+    tower.my_remaining_lifeforce = my_lives
+    tower.battles_played = battles
+    tower.seen_elements = BSet()
+    tower.seen_elements.elems = seen
+    RandomGen.set_seed(seed)
+
+    log_path = path + LOG_SUFFIX
+    header = LOG_HEADER.pack(LOG_MAGIC, zlib.crc32(data))
+    log = b""
+    if os.path.exists(log_path):
+        with open(log_path, "rb") as f:
+            log = f.read()
+    tower.close_log()
+    if log[:LOG_HEADER.size] != header:
+        # No log, or the log of the previous checkpoint: its records are all in this one.
+        tower.log = open(log_path, "wb")
+        tower.log.write(header)
+        tower.log.flush()
+        return
+    complete = (len(log) - LOG_HEADER.size) // LOG_RECORD.size
+    for i in range(complete):
+        apply_record(tower, LOG_RECORD.unpack_from(log, LOG_HEADER.size + i * LOG_RECORD.size))
+    tower.log = open(log_path, "r+b")
+    # Drop a record a crash cut short, so the next one starts on a record boundary.
+    tower.log.truncate(LOG_HEADER.size + complete * LOG_RECORD.size)
+    tower.log.seek(LOG_HEADER.size + complete * LOG_RECORD.size)
+
+
+def apply_record(tower: BattleTower, record: tuple) -> None:
+    """
+    Redoes the effect of one logged battle on the tower, without battling.
+    Records the tower already includes are skipped.
+    :raises ValueError: if the record is for a later battle than the next one.
+    :complexity: O(1), O(sort_roster) for a sort.
+    """
+    battle_number, result, my_lives, enemy_lives, seed = record
+    if result == SORT_RECORD:
+        if battle_number == tower.battles_played:
+            tower.sort_roster()
+        elif battle_number > tower.battles_played:
+            raise ValueError(f"Log skips from battle {tower.battles_played} to a sort after battle {battle_number}.")
+        return
+    if battle_number <= tower.battles_played:
+        return
+    if battle_number != tower.battles_played + 1:
+        raise ValueError(f"Log skips from battle {tower.battles_played} to battle {battle_number}.")
+    enemy_entry = tower.enemy_teams.serve()
+    tower.seen_elements = tower.seen_elements | tower.my_team.element_set() | tower.enemy_element_set(enemy_entry)
+    if enemy_lives > 0:
+        tower.enemy_teams.append((enemy_entry[0], enemy_lives))
+    tower.my_remaining_lifeforce = my_lives
+    tower.battles_played = battle_number
+    RandomGen.set_seed(seed)
+
+
+def append_record(log: BinaryIO, tower: BattleTower, result: Optional[Battle.Result], enemy_lives: int = 0) -> None:
+    """
+    Appends the battle just played to the log, or a sort of the roster when result is None,
+    and flushes it. :complexity: O(1)
+    """
+    result_value = SORT_RECORD if result is None else result.value
+    log.write(LOG_RECORD.pack(tower.battles_played, result_value, tower.my_remaining_lifeforce, enemy_lives, RandomGen.seed))
+    log.flush()
@@ -0,0 +1,232 @@
+"""
+Monte Carlo runs of many independent BattleTower campaigns.
+
+Each campaign is described by a TowerConfig (seed, player team spec, number of enemy teams) and
+played to the end in a worker process. Instead of per-battle tuples, every campaign feeds a
+TowerStats: counters, histograms and a running mean / variance, all of which merge exactly, so
+workers summarise their own chunk of campaigns and only the summaries travel back.
+
+Usage:
+```
+configs = [TowerConfig(seed, spec, 50) for seed in range(1000)]
+stats, records = simulate(configs, workers=4, keep_records=True)
+print(stats.summary())
+```
+"""
+from __future__ import annotations
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, NamedTuple, Optional
+
+from battle import Battle
+from battle_pool import TeamSpec, init_worker
+from elements import Element
+from random_gen import RandomGen
+from team import MonsterTeam
+from tower import BattleTower
+
+DEFAULT_CHUNK_SIZE = 16
+
+
+class TowerConfig(NamedTuple):
+    seed: int
+    team_spec: TeamSpec
+    n_teams: int
+    lazy: bool = True
+
+
+class TowerRecord(NamedTuple):
+    """The outcome of one campaign."""
+    seed: int
+    battles: int
+    my_lives: int
+    enemies_left: int
+    won: bool
+
+
+class RunningMean:
+    """Count, mean and variance of a stream of numbers, mergeable with another RunningMean."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value: float) -> None:
+        """Welford's update. :complexity: O(1)"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def merge(self, other: RunningMean) -> None:
+        """Chan et al.'s pairwise combination. :complexity: O(1)"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class TowerStats:
+    """
+    Mergeable summary of any number of campaigns.
+
+    Attributes:
+        towers, towers_won (int): campaigns played, and those that ended with every enemy out of lives
+        results (array): battles by Battle.Result value (index 0 unused)
+        battles_survived (RunningMean): battles played per campaign
+        my_lives (array): histogram of the player's lives at the end of a campaign
+        enemy_lives (array): histogram of enemy lives after each battle
+        elements (array): battles faced against an enemy with each element, by Element value (index 0 unused)
+    """
+
+    def __init__(self) -> None:
+        self.towers = 0
+        self.towers_won = 0
+        self.results = array("q", bytes(8 * (len(Battle.Result) + 1)))
+        self.battles_survived = RunningMean()
+        self.my_lives = array("q", bytes(8 * (BattleTower.MAX_LIVES + 1)))
+        self.enemy_lives = array("q", bytes(8 * (BattleTower.MAX_LIVES + 1)))
+        self.elements = array("q", bytes(8 * (len(Element) + 1)))
+
+    def add_battle(self, result: Battle.Result, enemy_lives: int, enemy_elements: int) -> None:
+        """Counts one battle. enemy_elements is the BSet bits of the enemy team. :complexity: O(elements)"""
+        self.results[result.value] += 1
+        self.enemy_lives[enemy_lives] += 1
+        while enemy_elements:
+            lowest = enemy_elements & -enemy_elements
+            self.elements[lowest.bit_length()] += 1
+            enemy_elements ^= lowest
+
+    def add_tower(self, record: TowerRecord) -> None:
+        """:complexity: O(1)"""
+        self.towers += 1
+        self.towers_won += record.won
+        self.battles_survived.add(record.battles)
+        self.my_lives[record.my_lives] += 1
+
+    def merge(self, other: TowerStats) -> None:
+        """Adds other's campaigns to these. :complexity: O(MAX_LIVES + elements)"""
+        self.towers += other.towers
+        self.towers_won += other.towers_won
+        self.battles_survived.merge(other.battles_survived)
+        for mine, theirs in (
+            (self.results, other.results),
+            (self.my_lives, other.my_lives),
+            (self.enemy_lives, other.enemy_lives),
+            (self.elements, other.elements),
+        ):
+            for i in range(len(mine)):
+                mine[i] += theirs[i]
+
+    def summary(self) -> dict:
+        battles = sum(self.results)
+        return {
+            "towers": self.towers,
+            "win_rate": self.towers_won / self.towers if self.towers else 0.0,
+            "battles": battles,
+            "results": {result.name: self.results[result.value] for result in Battle.Result},
+            "battles_survived": {
+                "mean": self.battles_survived.mean,
+                "variance": self.battles_survived.variance(),
+                "min": self.battles_survived.minimum,
+                "max": self.battles_survived.maximum,
+            },
+            "my_lives": self.my_lives.tolist(),
+            "enemy_lives": self.enemy_lives.tolist(),
+            "element_frequency": {
+                element.name: self.elements[element.value] / battles if battles else 0.0 for element in Element
+            },
+        }
+
+
+def run_tower(config: TowerConfig, stats: TowerStats) -> TowerRecord:
+    """Plays one campaign to the end, counting it into stats."""
+    RandomGen.set_seed(config.seed)
+    tower = BattleTower(Battle(verbosity=0))
+    tower.set_my_team(MonsterTeam.from_spec(config.team_spec))
+    tower.generate_teams(config.n_teams, lazy=config.lazy)
+    for result, _, enemy_team, _, enemy_lives in tower:
+        stats.add_battle(result, enemy_lives, enemy_team.element_set().elems)
+    record = TowerRecord(
+        config.seed,
+        tower.battles_played,
+        tower.my_remaining_lifeforce,
+        len(tower.enemy_teams),
+        tower.my_remaining_lifeforce > 0 and len(tower.enemy_teams) == 0,
+    )
+    stats.add_tower(record)
+    return record
+
+
+def run_chunk(configs: list[TowerConfig], keep_records: bool) -> tuple[TowerStats, Optional[list[TowerRecord]]]:
+    """Plays a chunk of campaigns, returning their merged stats (and records when asked for)."""
+    stats = TowerStats()
+    records = [] if keep_records else None
+    for config in configs:
+        record = run_tower(config, stats)
+        if keep_records:
+            records.append(record)
+    return stats, records
+
+
+def _chunks(configs: Iterable[TowerConfig], chunk_size: int):
+    chunk = []
+    for config in configs:
+        chunk.append(config)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def simulate(
+    configs: Iterable[TowerConfig],
+    workers: int = 1,
+    keep_records: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> tuple[TowerStats, Optional[list[TowerRecord]]]:
+    """
+    Plays every campaign and returns the merged TowerStats, plus the TowerRecord of every campaign in
+    input order when keep_records is set. Each campaign reseeds RandomGen from its config, so results
+    do not depend on the number of workers.
+
+    Complexity: O(M x campaign / workers) wall time for M campaigns, and O(M / chunk_size) merges.
+    """
+    stats = TowerStats()
+    records = [] if keep_records else None
+
+    def collect(chunk_stats, chunk_records):
+        stats.merge(chunk_stats)
+        if keep_records:
+            records.extend(chunk_records)
+
+    chunks = _chunks(configs, chunk_size)
+    if workers <= 1:
+        init_worker()
+        for chunk in chunks:
+            collect(*run_chunk(chunk, keep_records))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            for chunk_stats, chunk_records in pool.map(run_chunk, chunks, repeat(keep_records)):
+                collect(chunk_stats, chunk_records)
+    return stats, records